@@ -1,23 +1,52 @@
 import os
-from datetime import datetime, timedelta
-from typing import List, Dict
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 
 from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
 
+from utils.cache_manager import CacheManager
+from utils.commit_store import JsonCommitStore, SqliteCommitStore
 from utils.constants import STOP_WORDS
-from utils.service import get_api_outliers_stdev, get_authors_from_commit, filter_by_metric_type_and_author, \
-    get_most_frequent_words
-from github_fetcher import get_commits_between
+from utils.service import get_api_outliers_stdev, filter_by_metric_type_and_author, get_most_frequent_words, \
+    get_approx_authors, get_approx_outliers, get_approx_most_frequent_words, OutliersAggregator, run_aggregators
+from utils.sketch_index import CommitSketch, SketchIndex
+import github_fetcher
+import local_git_fetcher
 
 # --------------------------------------------------------------------------------------
 # Configuration
 # --------------------------------------------------------------------------------------
 OWNER = os.getenv("REPO_OWNER", "OpenRA")
 REPO = os.getenv("REPO_NAME", "OpenRA")
+# "github" pulls history through the GraphQL API, "git" reads a local (or bare) clone offline
+COMMIT_SOURCE = os.getenv("COMMIT_SOURCE", "github")
+LOCAL_REPO_PATH = os.getenv("LOCAL_REPO_PATH")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-if not GITHUB_TOKEN:
-    raise RuntimeError("Please set GITHUB_TOKEN environment variable with a personal access token")
+if COMMIT_SOURCE == "github":
+    if not GITHUB_TOKEN:
+        raise RuntimeError("Please set GITHUB_TOKEN environment variable with a personal access token")
+elif COMMIT_SOURCE == "git":
+    if not LOCAL_REPO_PATH:
+        raise RuntimeError("Please set LOCAL_REPO_PATH environment variable to a local clone of the repository")
+else:
+    raise RuntimeError(f"Unknown COMMIT_SOURCE '{COMMIT_SOURCE}', expected 'github' or 'git'")
+# "json" keeps a JSON Lines file per repo, "sqlite" an indexed database with full-text message search
+COMMIT_STORE = os.getenv("COMMIT_STORE", "json")
+if COMMIT_STORE not in ("json", "sqlite"):
+    raise RuntimeError(f"Unknown COMMIT_STORE '{COMMIT_STORE}', expected 'json' or 'sqlite'")
+# upper bound for /api/search?limit=, so a request cannot ask for every match
+SEARCH_MAX_LIMIT = 1000
+# stream commits from the store through single-pass aggregators instead of loading whole ranges
+STREAMING = os.getenv("STREAMING", "0") == "1"
+# disk budget for backend/cache/, enforced with LRU eviction after every fetch
+CACHE_MAX_MB = float(os.getenv("CACHE_MAX_MB", "1024"))
+# how far before the newest stored commit a GitHub sync looks again, to catch merged branches with older commits
+SYNC_LOOKBACK_DAYS = int(os.getenv("SYNC_LOOKBACK_DAYS", "30"))
+# how far back the first incremental sync reaches when the store is still empty
+SYNC_BACKFILL_DAYS = int(os.getenv("SYNC_BACKFILL_DAYS", "365"))
 
 BACKEND_DIR = os.path.dirname(__file__)
 FRONTEND_DIR = os.path.abspath(os.path.join(BACKEND_DIR, "..", "frontend"))
@@ -28,6 +57,16 @@ FRONTEND_DIR = os.path.abspath(os.path.join(BACKEND_DIR, "..", "frontend"))
 app = Flask(__name__, static_folder=FRONTEND_DIR, static_url_path="/")
 CORS(app)
 
+if COMMIT_STORE == "sqlite":
+    commit_store = SqliteCommitStore(OWNER, REPO, os.path.join(github_fetcher.CACHE_DIR, "commits.sqlite3"))
+else:
+    commit_store = JsonCommitStore(OWNER, REPO, github_fetcher.CACHE_DIR)
+sketch_index = SketchIndex(OWNER, REPO, COMMIT_STORE, github_fetcher.CACHE_DIR, STOP_WORDS)
+cache_manager = CacheManager(github_fetcher.CACHE_DIR, int(CACHE_MAX_MB * 1024 * 1024))
+# the dev server is threaded: fetching, merging, sketch updates and pruning must not interleave,
+# or a sync overlapping an uncovered range request would ingest the same commits twice
+store_lock = threading.Lock()
+
 
 # --------------------------------------------------------------------------------------
 # Helpers
@@ -39,11 +78,91 @@ def _default_dates():
     return start.isoformat(), end.isoformat()
 
 
-def _get_commits(start: str, end: str) -> List[Dict]:
+def _fetch_range(start: str, end: str) -> Iterator[Dict]:
+    if COMMIT_SOURCE == "git":
+        return local_git_fetcher.iter_commits_between(OWNER, REPO, start, end, LOCAL_REPO_PATH)
+    return github_fetcher.iter_commits_between(OWNER, REPO, start, end, GITHUB_TOKEN)
+
+
+def _fetch_since(since: str) -> List[Dict]:
+    if COMMIT_SOURCE == "git":
+        return local_git_fetcher.get_commits_since(LOCAL_REPO_PATH, since)
+    return github_fetcher.get_commits_since(OWNER, REPO, since, GITHUB_TOKEN)
+
+
+def _fetch_new(newest_sha: str, newest_date: str) -> Tuple[str, List[Dict]]:
+    """
+    Fetch commits added since newest_sha was stored, including older-dated commits from merged
+    branches. Returns the first day the fetch is complete for, and the commits.
+    """
+    if COMMIT_SOURCE == "git":
+        try:
+            return newest_date[:10], local_git_fetcher.get_commits_after(LOCAL_REPO_PATH, newest_sha)
+        except RuntimeError as e:
+            # newest_sha is gone, e.g. after a force push; fall back to the date window below
+            print(f"[app] Reachability sync failed ({e}), falling back to a date window")
+    # GitHub history can only be filtered by date, so re-query a lookback window and let the
+    # sha dedup drop the commits we already have
+    start = (date.fromisoformat(newest_date[:10]) - timedelta(days=SYNC_LOOKBACK_DAYS)).isoformat()
+    return start, _fetch_since(f"{start}T00:00:00Z")
+
+
+def _ensure_range(start: str, end: str) -> Tuple[str, str]:
+    """Make sure the store covers the requested range, fetching the missing parts if needed."""
     if not start or not end:
         start, end = _default_dates()
-    commits = get_commits_between(OWNER, REPO, start, end, GITHUB_TOKEN)
-    return commits
+    with store_lock:
+        # checked under the lock, so a concurrent request that just fetched the range is not repeated;
+        # only the uncovered days are fetched, e.g. just today when the default view moved by a day
+        missing = commit_store.missing(start, end)
+        for gap_start, gap_end in missing:
+            new_commits = commit_store.merge(_fetch_range(gap_start, gap_end), gap_start, gap_end)
+            sketch_index.update(new_commits, commit_store.meta["count"])
+        if missing:
+            # the range files are redundant once merged into the store, so they are good eviction candidates
+            cache_manager.prune(protected=commit_store.paths + [sketch_index.path])
+        cache_manager.touch(*commit_store.paths)
+    return start, end
+
+
+def _get_commits(start: str, end: str, author: Optional[str] = None) -> Iterable[Dict]:
+    start, end = _ensure_range(start, end)
+    if STREAMING:
+        return commit_store.iter_query(start, end, author)
+    return commit_store.query(start, end, author)
+
+
+def _get_sketch(start: str, end: str) -> CommitSketch:
+    start, end = _ensure_range(start, end)
+    with store_lock:
+        sketch = sketch_index.query(start, end, commit_store.iter_query, commit_store.meta["count"])
+        cache_manager.touch(sketch_index.path)
+    return sketch
+
+
+def _approx_requested() -> bool:
+    return request.args.get("mode", "exact") == "approx"
+
+
+def _sync_commits() -> Dict:
+    """Pull only the commits added since the newest one already stored."""
+    today = datetime.utcnow().date()
+    with store_lock:
+        if commit_store.newest_date:
+            start, commits = _fetch_new(commit_store.meta["newest_sha"], commit_store.newest_date)
+        else:
+            # reach back as far as the default view (yesterday minus SYNC_BACKFILL_DAYS)
+            start = (today - timedelta(days=SYNC_BACKFILL_DAYS + 1)).isoformat()
+            commits = _fetch_since(f"{start}T00:00:00Z")
+        new_commits = commit_store.merge(commits, start, today.isoformat())
+        sketch_index.update(new_commits, commit_store.meta["count"])
+        cache_manager.touch(*commit_store.paths)
+        return {
+            "new_commits": len(new_commits),
+            "newest_sha": commit_store.meta["newest_sha"],
+            "newest_date": commit_store.newest_date,
+            "total_commits": commit_store.meta["count"],
+        }
 
 
 # --------------------------------------------------------------------------------------
@@ -56,8 +175,11 @@ def api_authors():
     start = request.args.get("start_date")
     end = request.args.get("end_date")
 
-    commits = _get_commits(start=start, end=end)
-    authors = get_authors_from_commit(commits)
+    if _approx_requested():
+        return jsonify(get_approx_authors(_get_sketch(start, end)))
+
+    start, end = _ensure_range(start, end)
+    authors = commit_store.authors(start, end)
     return jsonify(authors)
 
 
@@ -66,9 +188,15 @@ def api_outliers():
     start = request.args.get("start_date")
     end = request.args.get("end_date")
 
+    if _approx_requested():
+        return jsonify(get_approx_outliers(_get_sketch(start, end)))
+
     commits = _get_commits(start=start, end=end)
 
-    outliers = get_api_outliers_stdev(commits)
+    if STREAMING:
+        outliers = run_aggregators(commits, OutliersAggregator())[0]
+    else:
+        outliers = get_api_outliers_stdev(commits)
     return jsonify(outliers)
 
 
@@ -77,11 +205,12 @@ def api_activity():
     start = request.args.get("start_date")
     end = request.args.get("end_date")
 
-    commits = _get_commits(start=start, end=end)
-
     metric_type = request.args.get("metric_type", "commits")
     author_filter = request.args.get("author")
 
+    # the author filter is pushed down to the store; filtering again in Python is a no-op
+    commits = _get_commits(start=start, end=end, author=author_filter)
+
     result = filter_by_metric_type_and_author(commits, metric_type, author_filter)
     return jsonify(result)
 
@@ -91,12 +220,54 @@ def api_word_frequency():
     start = request.args.get("start_date")
     end = request.args.get("end_date")
 
+    if _approx_requested():
+        return jsonify(get_approx_most_frequent_words(_get_sketch(start, end)))
+
     commits = _get_commits(start=start, end=end)
 
     results = get_most_frequent_words(commits, STOP_WORDS)
     return jsonify(results)
 
 
+@app.route("/api/search")
+def api_search():
+    if COMMIT_STORE != "sqlite":
+        return jsonify({"error": "Message search requires COMMIT_STORE=sqlite"}), 400
+    text = request.args.get("q")
+    if not text:
+        return jsonify({"error": "Missing search query parameter 'q'"}), 400
+    limit = request.args.get("limit", 100, type=int)
+    if not 1 <= limit <= SEARCH_MAX_LIMIT:
+        return jsonify({"error": f"'limit' must be between 1 and {SEARCH_MAX_LIMIT}"}), 400
+    start = request.args.get("start_date")
+    end = request.args.get("end_date")
+    if start and end:
+        _ensure_range(start, end)
+
+    try:
+        results = commit_store.search(
+            text,
+            start=start,
+            end=end,
+            author=request.args.get("author"),
+            limit=limit,
+        )
+    except sqlite3.OperationalError as e:
+        return jsonify({"error": f"Invalid search query: {e}"}), 400
+    return jsonify(results)
+
+
+@app.route("/api/sync", methods=["POST"])
+def api_sync():
+    return jsonify(_sync_commits())
+
+
+@app.route("/api/cache/stats")
+def api_cache_stats():
+    with store_lock:
+        return jsonify(cache_manager.stats())
+
+
 # --------------------------------------------------------------------------------------
 # Frontend routes (serves built or raw files)
 # --------------------------------------------------------------------------------------
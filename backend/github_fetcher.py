@@ -1,13 +1,13 @@
 import os
-import json
 import time
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, Tuple
 
 import requests
 from tqdm import tqdm
 
 from utils.constants import GITHUB_API_URL
 from utils.graphql_queries import HISTORY_QUERY
+from utils.json_stream import iter_json_array, write_json_array
 
 CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache")
 os.makedirs(CACHE_DIR, exist_ok=True)
@@ -27,71 +27,87 @@ def _run_query(query: str, variables: dict, token: str) -> dict:
         raise RuntimeError(f"GitHub API error {response.status_code}: {response.text}")
 
 
-def get_commits_between(owner: str, repo: str, start: str, end: str, token: str) -> List[Dict]:
-    """Fetch commits between ISO8601 date strings start and end inclusive. Uses local cache if available."""
-    cache_file = _cache_path(owner, repo, start, end)
-    if os.path.exists(cache_file):
-        with open(cache_file, "r") as f:
-            data = json.load(f)
-        print(f"[github_fetcher] Using cached data from {cache_file} (commits: {len(data)})")
-        return data
+def _to_commit(node: dict) -> Dict:
+    return {
+        "sha": node["oid"],
+        "date": node["committedDate"],
+        "message": node["message"],
+        "additions": node["additions"],
+        "deletions": node["deletions"],
+        "author": {
+            "name": node["author"]["name"],
+            "email": node["author"]["email"],
+            "login": node["author"]["user"]["login"] if node["author"]["user"] else None,
+        },
+    }
 
-    print(f"[github_fetcher] No cache found. Fetching commits for {owner}/{repo} {start}->{end}")
-    all_commits: List[Dict] = []
-    cursor: Optional[str] = None
 
-    first=100
+def _iter_history_pages(owner: str, repo: str, since: str, until: Optional[str], token: str) -> Iterator[Tuple[int, List[Dict]]]:
+    """Yield (total_count, commits) for each page of default branch history between two timestamps."""
     variables = {
         "owner": owner,
         "name": repo,
-        "since": f"{start}T00:00:00Z",
-        "until": f"{end}T23:59:59Z",
-        "cursor": cursor,
+        "since": since,
+        "until": until,
+        "cursor": None,
     }
-    result = _run_query(HISTORY_QUERY, variables, token)
-    if "errors" in result:
-        raise RuntimeError(result["errors"])
-
-    history = result["data"]["repository"]["defaultBranchRef"]["target"]["history"]
-    total_count = history["totalCount"]
-    pages = (total_count + first - 1) // first
-
-    pbar = tqdm(total=pages, desc="Fetching pages")
-
     while True:
-        edges = history["edges"]
-        for edge in edges:
-            node = edge["node"]
-            commit = {
-                "sha": node["oid"],
-                "date": node["committedDate"],
-                "message": node["message"],
-                "additions": node["additions"],
-                "deletions": node["deletions"],
-                "author": {
-                    "name": node["author"]["name"],
-                    "email": node["author"]["email"],
-                    "login": node["author"]["user"]["login"] if node["author"]["user"] else None,
-                },
-            }
-            all_commits.append(commit)
-
-        pbar.update(1)
+        result = _run_query(HISTORY_QUERY, variables, token)
+        if "errors" in result:
+            raise RuntimeError(result["errors"])
 
-        # persist after each page
-        with open(cache_file, "w") as f:
-            json.dump(all_commits, f)
+        history = result["data"]["repository"]["defaultBranchRef"]["target"]["history"]
+        yield history["totalCount"], [_to_commit(edge["node"]) for edge in history["edges"]]
 
-        page_info = result["data"]["repository"]["defaultBranchRef"]["target"]["history"]["pageInfo"]
+        page_info = history["pageInfo"]
         if not page_info["hasNextPage"]:
             break
-
-        cursor = history["pageInfo"]["endCursor"]
-        variables["cursor"] = cursor
-        result = _run_query(HISTORY_QUERY, variables, token)
-        history = result["data"]["repository"]["defaultBranchRef"]["target"]["history"]
+        variables["cursor"] = page_info["endCursor"]
         # minor throttle to respect secondary rate limits
         time.sleep(0.8)
+
+
+def iter_commits_between(owner: str, repo: str, start: str, end: str, token: str) -> Iterator[Dict]:
+    """
+    Stream commits between ISO8601 date strings start and end inclusive, one at a time. Uses the
+    local cache if available, otherwise fetches page by page and writes the cache as it goes.
+    """
+    cache_file = _cache_path(owner, repo, start, end)
+    if os.path.exists(cache_file):
+        print(f"[github_fetcher] Streaming cached data from {cache_file}")
+        yield from iter_json_array(cache_file)
+        return
+
+    print(f"[github_fetcher] No cache found. Fetching commits for {owner}/{repo} {start}->{end}")
+    yield from write_json_array(cache_file, _iter_history_with_progress(owner, repo, start, end, token))
+    print(f"[github_fetcher] Cached at {cache_file}")
+
+
+def _iter_history_with_progress(owner: str, repo: str, start: str, end: str, token: str) -> Iterator[Dict]:
+    first = 100
+    pbar = None
+    fetched = 0
+    for total_count, commits in _iter_history_pages(owner, repo, f"{start}T00:00:00Z", f"{end}T23:59:59Z", token):
+        if pbar is None:
+            pages = (total_count + first - 1) // first
+            pbar = tqdm(total=pages, desc="Fetching pages")
+        yield from commits
+        fetched += len(commits)
+        pbar.update(1)
+
     pbar.close()
-    print(f"[github_fetcher] Fetched {len(all_commits)} commits. Cached at {cache_file}")
-    return all_commits 
\ No newline at end of file
+    print(f"[github_fetcher] Fetched {fetched} commits")
+
+
+def get_commits_between(owner: str, repo: str, start: str, end: str, token: str) -> List[Dict]:
+    """Fetch commits between ISO8601 date strings start and end inclusive. Uses local cache if available."""
+    return list(iter_commits_between(owner, repo, start, end, token))
+
+
+def get_commits_since(owner: str, repo: str, since: str, token: str) -> List[Dict]:
+    """Fetch every commit committed at or after the ISO8601 timestamp since, bypassing the range cache."""
+    all_commits: List[Dict] = []
+    for _, commits in _iter_history_pages(owner, repo, since, None, token):
+        all_commits.extend(commits)
+    print(f"[github_fetcher] Fetched {len(all_commits)} commits for {owner}/{repo} since {since}")
+    return all_commits
@@ -0,0 +1,120 @@
+import os
+import re
+import subprocess
+import tempfile
+from functools import lru_cache
+from typing import List, Dict, Iterator, Optional
+
+from tqdm import tqdm
+
+from github_fetcher import _cache_path
+from utils.git_log_parser import GIT_LOG_FORMAT, parse_git_log
+from utils.json_stream import iter_json_array, write_json_array
+
+
+@lru_cache(maxsize=1)
+def _merge_diff_options() -> List[str]:
+    """
+    Options making `git log --numstat` diff merges against their first parent, like the GitHub API
+    does; by default it prints no numstat for merges at all. --diff-merges needs git 2.31.
+    """
+    output = subprocess.run(["git", "version"], capture_output=True, text=True, check=True).stdout
+    match = re.search(r"(\d+)\.(\d+)", output)
+    if match and (int(match.group(1)), int(match.group(2))) >= (2, 31):
+        return ["--diff-merges=first-parent"]
+    # older git only has -m, which repeats a merge once per parent; _iter_git_log keeps the first
+    # (--first-parent would also stop walking merged branches, so it is not an option)
+    return ["-m"]
+
+
+def _git_log_command(repo_path: str, since: Optional[str], until: Optional[str], revision: str) -> List[str]:
+    command = [
+        "git", "-C", repo_path, "log",
+        "--numstat",
+        "--no-renames",
+        *_merge_diff_options(),
+        f"--format={GIT_LOG_FORMAT}",
+    ]
+    if since:
+        command.append(f"--since={since}")
+    if until:
+        command.append(f"--until={until}")
+    command.append(revision)
+    return command
+
+
+def _iter_git_log(repo_path: str, since: Optional[str], until: Optional[str], revision: str = "HEAD") -> Iterator[Dict]:
+    if not os.path.isdir(repo_path):
+        raise RuntimeError(f"Local repository not found: {repo_path}")
+
+    # stderr goes to a temp file so a chatty git can never fill a pipe nobody is reading
+    with tempfile.TemporaryFile(mode="w+", encoding="utf-8", errors="replace") as stderr:
+        proc = subprocess.Popen(
+            _git_log_command(repo_path, since, until, revision),
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+            encoding="utf-8",
+            errors="replace",
+        )
+        finished = False
+        try:
+            previous_sha = None
+            for commit in parse_git_log(proc.stdout):
+                # with -m the diff against the first parent comes first, further parents are skipped
+                if commit["sha"] != previous_sha:
+                    yield commit
+                previous_sha = commit["sha"]
+            finished = True
+        finally:
+            proc.stdout.close()
+            # the consumer may stop iterating early; never leave the child behind
+            if not finished:
+                proc.kill()
+            returncode = proc.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"git log failed for {repo_path}: {stderr.read().strip()}")
+
+
+def iter_commits_between(owner: str, repo: str, start: str, end: str, repo_path: str) -> Iterator[Dict]:
+    """
+    Stream commits between ISO8601 date strings start and end inclusive from a local (or bare) clone.
+
+    Works fully offline and shares the on-disk cache with the GitHub fetcher; the cache is read and
+    written one commit at a time. Merge commits report their diff against the first parent, the
+    same as the GitHub source.
+    """
+    cache_file = _cache_path(owner, repo, start, end)
+    if os.path.exists(cache_file):
+        print(f"[local_git_fetcher] Streaming cached data from {cache_file}")
+        yield from iter_json_array(cache_file)
+        return
+
+    print(f"[local_git_fetcher] No cache found. Reading commits from {repo_path} {start}->{end}")
+    with tqdm(desc="Reading commits", unit=" commits") as pbar:
+        for commit in write_json_array(cache_file, _iter_git_log(repo_path, f"{start}T00:00:00Z", f"{end}T23:59:59Z")):
+            yield commit
+            pbar.update(1)
+    print(f"[local_git_fetcher] Read {pbar.n} commits. Cached at {cache_file}")
+
+
+def get_commits_between(owner: str, repo: str, start: str, end: str, repo_path: str) -> List[Dict]:
+    """Read commits between ISO8601 date strings start and end inclusive. Uses local cache if available."""
+    return list(iter_commits_between(owner, repo, start, end, repo_path))
+
+
+def get_commits_since(repo_path: str, since: str) -> List[Dict]:
+    """Read every commit committed at or after the ISO8601 timestamp since, bypassing the range cache."""
+    all_commits = list(_iter_git_log(repo_path, since, None))
+    print(f"[local_git_fetcher] Read {len(all_commits)} commits from {repo_path} since {since}")
+    return all_commits
+
+
+def get_commits_after(repo_path: str, sha: str) -> List[Dict]:
+    """
+    Read every commit reachable from HEAD but not from sha, whatever its date. Unlike
+    get_commits_since this also picks up older commits brought in by a later merge.
+    """
+    all_commits = list(_iter_git_log(repo_path, None, None, f"{sha}..HEAD"))
+    print(f"[local_git_fetcher] Read {len(all_commits)} commits from {repo_path} after {sha[:7]}")
+    return all_commits
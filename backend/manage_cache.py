@@ -0,0 +1,87 @@
+"""
+Inspect and maintain the on-disk cache in backend/cache/.
+
+    python backend/manage_cache.py inspect
+    python backend/manage_cache.py prune --max-mb 200
+    python backend/manage_cache.py compact
+"""
+import os
+import argparse
+from datetime import datetime
+
+from github_fetcher import CACHE_DIR
+from utils.cache_manager import CacheManager
+from utils.commit_store import JsonCommitStore, SqliteCommitStore
+
+SQLITE_PATH = os.path.join(CACHE_DIR, "commits.sqlite3")
+
+
+def _mb(size: int) -> str:
+    return f"{size / (1024 * 1024):.2f} MB"
+
+
+def _budget_bytes(max_mb) -> int:
+    if max_mb is None:
+        max_mb = float(os.getenv("CACHE_MAX_MB", "1024"))
+    return int(max_mb * 1024 * 1024)
+
+
+def inspect(manager: CacheManager):
+    for entry in manager.entries():
+        last_access = datetime.fromtimestamp(entry["last_access"]).strftime("%Y-%m-%d %H:%M")
+        print(f"{entry['kind']:<9} {_mb(entry['size']):>12}  {last_access}  {entry['name']}")
+    stats = manager.stats()
+    print(f"\n{stats['entries']} entries, {_mb(stats['total_bytes'])} total")
+
+
+def prune(manager: CacheManager, max_mb, include_stores: bool):
+    protected = []
+    if not include_stores:
+        # commit stores hold the sync state, so only drop them when explicitly asked to
+        protected = [e["files"][0] for e in manager.entries() if e["kind"] in ("store", "sqlite")]
+    evicted = manager.prune(_budget_bytes(max_mb), protected)
+    for entry in evicted:
+        print(f"[manage_cache] Evicted {entry['name']} ({_mb(entry['size'])})")
+    print(f"[manage_cache] Evicted {len(evicted)} entries, cache is now {_mb(manager.stats()['total_bytes'])}")
+
+
+def compact(manager: CacheManager, store: str):
+    if store == "sqlite":
+        def factory(owner, repo):
+            return SqliteCommitStore(owner, repo, SQLITE_PATH)
+    else:
+        def factory(owner, repo):
+            return JsonCommitStore(owner, repo, CACHE_DIR)
+
+    summary = manager.compact(factory)
+    for key, result in summary.items():
+        print(
+            f"[manage_cache] {key}: folded {result['files']} range files ({result['commits']} commits, "
+            f"{result['new_commits']} new) into the {store} store, removed {_mb(result['removed_bytes'])}"
+        )
+    if not summary:
+        print("[manage_cache] No range files to compact")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("inspect", help="list cache entries, least recently used first")
+    prune_parser = subparsers.add_parser("prune", help="evict least recently used entries over the budget")
+    prune_parser.add_argument("--max-mb", type=float, help="disk budget in MB (default: CACHE_MAX_MB or 1024)")
+    prune_parser.add_argument("--include-stores", action="store_true", help="also evict per-repo commit stores")
+    compact_parser = subparsers.add_parser("compact", help="fold per-range files into per-repo commit stores")
+    compact_parser.add_argument("--store", choices=["json", "sqlite"], default=os.getenv("COMMIT_STORE", "json"))
+    args = parser.parse_args()
+
+    manager = CacheManager(CACHE_DIR)
+    if args.command == "inspect":
+        inspect(manager)
+    elif args.command == "prune":
+        prune(manager, args.max_mb, args.include_stores)
+    else:
+        compact(manager, args.store)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import os
+import json
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .json_stream import iter_json_array
+
+MANIFEST_NAME = "cache_index.json"
+# touch() only records an access (and rewrites the manifest) once the previous one is this old;
+# LRU order does not need a finer resolution than that
+TOUCH_INTERVAL = 60.0
+
+# commits_<owner>_<repo>_<start>_<end>.json, as written by the fetchers
+_RANGE_FILE = re.compile(r"^commits_(?P<key>.+)_(?P<start>\d{4}-\d{2}-\d{2})_(?P<end>\d{4}-\d{2}-\d{2})\.json$")
+
+
+def _classify(fname: str) -> Optional[tuple]:
+    """Map a cache file to (entry name, kind). Files belonging together form one entry."""
+    if fname == MANIFEST_NAME or fname.endswith(".tmp"):
+        return None
+    if _RANGE_FILE.match(fname):
+        return fname, "range"
+    if fname.startswith("repo_") and fname.endswith(".jsonl"):
+        return fname[:-len(".jsonl")], "store"
+    if fname.startswith("repo_") and fname.endswith(".meta.json"):
+        return fname[:-len(".meta.json")], "store"
+    # sketches are derived from the store they were built from and are evicted together with it;
+    # otherwise the next fetch would fold the same commits into the surviving sketches a second time
+    if fname.startswith("sketches_json_") and fname.endswith(".json"):
+        return "repo_" + fname[len("sketches_json_"):-len(".json")], "store"
+    if fname.startswith("sketches_sqlite_") and fname.endswith(".json"):
+        return "commits.sqlite3", "sqlite"
+    if fname.startswith("sketches_") and fname.endswith(".json"):
+        # written before sketches were kept per store kind, no longer read
+        return fname, "sketches"
+    if fname.startswith("commits.sqlite3"):
+        # the database plus its -journal/-wal companions
+        return "commits.sqlite3", "sqlite"
+    return None
+
+
+def split_repo_key(key: str) -> tuple:
+    """Split "<owner>_<repo>" back into its parts. GitHub owners cannot contain underscores."""
+    owner, repo = key.split("_", 1)
+    return owner, repo
+
+
+class CacheManager:
+    """
+    Keeps `backend/cache/` within a disk budget.
+
+    A manifest records the last access of every cache entry; `prune` evicts the least recently used
+    entries until the total size fits the budget, and `compact` folds the per-range files into the
+    deduplicated per-repo commit store.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+        self.last_access: Dict[str, float] = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as f:
+                self.last_access = json.load(f)
+
+    def _save_manifest(self):
+        with open(self.manifest_path, "w") as f:
+            json.dump(self.last_access, f)
+
+    def entries(self) -> List[Dict]:
+        """Every cache entry with its files, total size and last access, least recently used first."""
+        grouped: Dict[str, Dict] = {}
+        for fname in os.listdir(self.cache_dir):
+            classified = _classify(fname)
+            if classified is None:
+                continue
+            name, kind = classified
+            path = os.path.join(self.cache_dir, fname)
+            stat = os.stat(path)
+            entry = grouped.setdefault(name, {"name": name, "kind": kind, "files": [], "size": 0, "mtime": 0.0})
+            entry["files"].append(path)
+            entry["size"] += stat.st_size
+            entry["mtime"] = max(entry["mtime"], stat.st_mtime)
+
+        entries = []
+        for entry in grouped.values():
+            # entries never seen through touch() fall back to their modification time
+            mtime = entry.pop("mtime")
+            entry["last_access"] = self.last_access.get(entry["name"], mtime)
+            entries.append(entry)
+        entries.sort(key=lambda e: e["last_access"])
+        return entries
+
+    def touch(self, *paths: str):
+        """Record an access to the entries owning the given paths, at most once per TOUCH_INTERVAL."""
+        now = time.time()
+        changed = False
+        for path in paths:
+            classified = _classify(os.path.basename(path))
+            if classified and os.path.exists(path):
+                if now - self.last_access.get(classified[0], 0.0) >= TOUCH_INTERVAL:
+                    self.last_access[classified[0]] = now
+                    changed = True
+        if changed:
+            self._save_manifest()
+
+    def stats(self) -> Dict:
+        entries = self.entries()
+        by_kind: Dict[str, Dict] = {}
+        for entry in entries:
+            kind = by_kind.setdefault(entry["kind"], {"entries": 0, "bytes": 0})
+            kind["entries"] += 1
+            kind["bytes"] += entry["size"]
+        return {
+            "total_bytes": sum(e["size"] for e in entries),
+            "max_bytes": self.max_bytes,
+            "entries": len(entries),
+            "by_kind": by_kind,
+        }
+
+    def prune(self, max_bytes: Optional[int] = None, protected: Iterable[str] = ()) -> List[Dict]:
+        """
+        Evict least recently used entries until the cache fits max_bytes (defaults to the configured
+        budget). Entries owning any of the protected paths are never evicted. Returns evicted entries.
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        if budget is None:
+            return []
+        protected = {os.path.abspath(p) for p in protected}
+
+        entries = self.entries()
+        total = sum(e["size"] for e in entries)
+        evicted = []
+        for entry in entries:
+            if total <= budget:
+                break
+            if any(os.path.abspath(p) in protected for p in entry["files"]):
+                continue
+            for path in entry["files"]:
+                os.remove(path)
+            self.last_access.pop(entry["name"], None)
+            total -= entry["size"]
+            evicted.append(entry)
+        if evicted:
+            self._save_manifest()
+        return evicted
+
+    def compact(self, store_factory: Callable[[str, str], object]) -> Dict[str, Dict]:
+        """
+        Merge every per-range file into its repo's commit store (deduplicated by sha, covered ranges
+        recorded) and delete the range files. store_factory(owner, repo) returns the store to use.
+        """
+        summary: Dict[str, Dict] = {}
+        stores: Dict[str, object] = {}
+        seen = 0
+
+        def counted(commits):
+            # range files are streamed into the store, so count the commits on the way through
+            nonlocal seen
+            for c in commits:
+                seen += 1
+                yield c
+
+        for entry in self.entries():
+            if entry["kind"] != "range":
+                continue
+            match = _RANGE_FILE.match(entry["name"])
+            key = match.group("key")
+            if key not in stores:
+                stores[key] = store_factory(*split_repo_key(key))
+            seen = 0
+            new_commits = stores[key].merge(
+                counted(iter_json_array(entry["files"][0])), match.group("start"), match.group("end")
+            )
+
+            os.remove(entry["files"][0])
+            self.last_access.pop(entry["name"], None)
+            repo_summary = summary.setdefault(key, {"files": 0, "commits": 0, "new_commits": 0, "removed_bytes": 0})
+            repo_summary["files"] += 1
+            repo_summary["commits"] += seen
+            repo_summary["new_commits"] += len(new_commits)
+            repo_summary["removed_bytes"] += entry["size"]
+        if summary:
+            self._save_manifest()
+        return summary
@@ -0,0 +1,429 @@
+import os
+import re
+import json
+import heapq
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import date, timedelta
+from itertools import islice
+from typing import List, Dict, Iterable, Iterator, Optional
+
+from .service import AuthorsAggregator, run_aggregators
+
+
+# merge() writes records with json.dumps, which keeps the fetchers' key order (sha, then date), so the
+# day of a line can be read without decoding it
+_LINE_DAY = re.compile(r'^\{"sha": "[^"]*", "date": "(\d{4}-\d{2}-\d{2})')
+
+
+def _author_name(commit: Dict) -> Optional[str]:
+    return commit["author"].get("name") or commit["author"].get("login")
+
+
+def _shift_day(day: str, days: int) -> str:
+    return (date.fromisoformat(day) + timedelta(days=days)).isoformat()
+
+
+def _merge_ranges(ranges: List[List[str]]) -> List[List[str]]:
+    """Collapse overlapping or adjacent [start, end] date ranges; both ends are inclusive days."""
+    merged: List[List[str]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= _shift_day(merged[-1][1], 1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _uncovered(ranges: List[List[str]], start: str, end: str) -> List[List[str]]:
+    """The parts of [start, end] outside the given sorted ranges, as inclusive [start, end] days."""
+    gaps = []
+    cursor = start
+    for r_start, r_end in ranges:
+        if r_end < cursor:
+            continue
+        if r_start > end:
+            break
+        if r_start > cursor:
+            gaps.append([cursor, _shift_day(r_start, -1)])
+        cursor = _shift_day(r_end, 1)
+        if cursor > end:
+            return gaps
+    gaps.append([cursor, end])
+    return gaps
+
+
+def _iter_lines_reversed(path: str, block_size: int = 1 << 16) -> Iterator[str]:
+    """Yield the lines of a file last to first, reading fixed-size blocks from the end."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        tail = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + tail).split(b"\n")
+            # the first piece may be the end of a line that starts in the previous block
+            tail = lines.pop(0)
+            for line in reversed(lines):
+                yield line.decode("utf-8")
+        yield tail.decode("utf-8")
+
+
+class JsonCommitStore:
+    """
+    Per-repo, sha-deduplicated commit store on disk.
+
+    Commits are kept in a JSON Lines file sorted by date (oldest first), so commits coming from an
+    incremental sync are simply appended. A small meta file records which date ranges are fully
+    covered and the newest ingested commit, which is where the next sync resumes from.
+    """
+
+    def __init__(self, owner: str, repo: str, cache_dir: str):
+        base = os.path.join(cache_dir, f"repo_{owner}_{repo}")
+        self.data_path = base + ".jsonl"
+        self.meta_path = base + ".meta.json"
+        self._meta_stamp = None
+        self.meta = self._load_meta()
+        self._lock = threading.Lock()
+
+    def _stamp(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.meta_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_meta(self) -> Dict:
+        self._meta_stamp = self._stamp()
+        if self._meta_stamp is not None:
+            with open(self.meta_path, "r") as f:
+                return json.load(f)
+        return {"ranges": [], "newest_sha": None, "newest_date": None, "count": 0}
+
+    def _save_meta(self):
+        with open(self.meta_path, "w") as f:
+            json.dump(self.meta, f)
+        self._meta_stamp = self._stamp()
+
+    def _refresh_meta(self):
+        # another process (cache eviction or compaction) may have deleted or rewritten the store
+        if self._stamp() != self._meta_stamp:
+            self.meta = self._load_meta()
+
+    @property
+    def newest_date(self) -> Optional[str]:
+        self._refresh_meta()
+        return self.meta["newest_date"]
+
+    @property
+    def paths(self) -> List[str]:
+        return [self.data_path, self.meta_path]
+
+    def covers(self, start: str, end: str) -> bool:
+        self._refresh_meta()
+        return any(r_start <= start and end <= r_end for r_start, r_end in self.meta["ranges"])
+
+    def missing(self, start: str, end: str) -> List[List[str]]:
+        """The sub-ranges of [start, end] that still have to be fetched, oldest first."""
+        self._refresh_meta()
+        return _uncovered(self.meta["ranges"], start, end)
+
+    def iter_commits(self) -> Iterator[Dict]:
+        if not os.path.exists(self.data_path):
+            return
+        with open(self.data_path, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_query(self, start: str, end: str, author: Optional[str] = None) -> Iterator[Dict]:
+        """Stream commits between ISO8601 date strings start and end inclusive, newest first."""
+        if not os.path.exists(self.data_path):
+            return
+        # the file is sorted oldest first, so reading it backwards gives the fetchers' order
+        for line in _iter_lines_reversed(self.data_path):
+            if not line.strip():
+                continue
+            match = _LINE_DAY.match(line)
+            day = match.group(1) if match else json.loads(line)["date"][:10]
+            if day > end:
+                # newer than the range: skipped without decoding, so old ranges stay cheap
+                continue
+            if day < start:
+                break
+            c = json.loads(line)
+            if not author or _author_name(c) == author:
+                yield c
+
+    def query(self, start: str, end: str, author: Optional[str] = None) -> List[Dict]:
+        """Commits between ISO8601 date strings start and end inclusive, newest first like the fetchers."""
+        return list(self.iter_query(start, end, author))
+
+    def authors(self, start: str, end: str) -> List[str]:
+        return run_aggregators(self.iter_query(start, end), AuthorsAggregator())[0]
+
+    def merge(self, commits: Iterable[Dict], start: str, end: str) -> List[Dict]:
+        """
+        Add commits fetched for the [start, end] date range, skipping shas already stored.
+        Returns the newly added commits so derived indexes can be updated incrementally.
+
+        commits may be any iterable and is consumed once; only the stored shas and the new commits
+        are held in memory.
+        """
+        # merges from several threads would each see the same known shas and append duplicates
+        with self._lock:
+            # another process (e.g. cache compaction) may have updated the store since we loaded it
+            self.meta = self._load_meta()
+            known = {c["sha"] for c in self.iter_commits()}
+            new_commits = []
+            for c in commits:
+                if c["sha"] not in known:
+                    known.add(c["sha"])
+                    new_commits.append(c)
+            new_commits.sort(key=lambda c: c["date"])
+
+            newest_date = self.meta["newest_date"]
+            if not newest_date or not new_commits or new_commits[0]["date"] >= newest_date:
+                # the common sync case: everything is newer than what we have, so just append
+                with open(self.data_path, "a") as f:
+                    for c in new_commits:
+                        f.write(json.dumps(c) + "\n")
+            else:
+                # backfilled history: interleave it with the sorted file instead of loading the file
+                merged = heapq.merge(self.iter_commits(), new_commits, key=lambda c: c["date"])
+                tmp_path = self.data_path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    for c in merged:
+                        f.write(json.dumps(c) + "\n")
+                os.replace(tmp_path, self.data_path)
+
+            if new_commits and (not newest_date or new_commits[-1]["date"] >= newest_date):
+                self.meta["newest_sha"] = new_commits[-1]["sha"]
+                self.meta["newest_date"] = new_commits[-1]["date"]
+            self.meta["count"] += len(new_commits)
+            self.meta["ranges"] = _merge_ranges(self.meta["ranges"] + [[start, end]])
+            self._save_meta()
+            return new_commits
+
+
+class SqliteCommitStore:
+    """
+    Commit store backed by an embedded SQLite database.
+
+    Same interface as JsonCommitStore, but date and author filters run against indexes on
+    (repo, date) and (repo, author) instead of scanning every commit in Python, and an FTS5
+    table over commit messages powers full-text search.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS commits (
+        id INTEGER PRIMARY KEY,
+        repo TEXT NOT NULL,
+        sha TEXT NOT NULL,
+        date TEXT NOT NULL,
+        message TEXT NOT NULL,
+        additions INTEGER NOT NULL,
+        deletions INTEGER NOT NULL,
+        author TEXT,
+        author_name TEXT,
+        author_email TEXT,
+        author_login TEXT,
+        UNIQUE (repo, sha)
+    );
+    CREATE INDEX IF NOT EXISTS idx_commits_repo_date ON commits (repo, date);
+    CREATE INDEX IF NOT EXISTS idx_commits_repo_author ON commits (repo, author, date);
+    CREATE VIRTUAL TABLE IF NOT EXISTS commits_fts USING fts5(message, content='commits', content_rowid='id');
+    CREATE TRIGGER IF NOT EXISTS commits_fts_insert AFTER INSERT ON commits BEGIN
+        INSERT INTO commits_fts (rowid, message) VALUES (new.id, new.message);
+    END;
+    CREATE TABLE IF NOT EXISTS repo_meta (
+        repo TEXT PRIMARY KEY,
+        meta TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, owner: str, repo: str, db_path: str):
+        self.repo = f"{owner}/{repo}"
+        self.db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(self.SCHEMA)
+            self.meta = self._load_meta(conn)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # one short-lived connection per call keeps the store safe to use from Flask worker threads
+        return sqlite3.connect(self.db_path)
+
+    def _load_meta(self, conn: sqlite3.Connection) -> Dict:
+        row = conn.execute("SELECT meta FROM repo_meta WHERE repo = ?", (self.repo,)).fetchone()
+        if row:
+            return json.loads(row[0])
+        return {"ranges": [], "newest_sha": None, "newest_date": None, "count": 0}
+
+    def _refresh_meta(self):
+        # another process (cache eviction or compaction) may have deleted or updated the database;
+        # connecting to a deleted one would create an empty file without the schema
+        with closing(self._connect()) as conn, conn:
+            if not self._has_schema(conn):
+                conn.executescript(self.SCHEMA)
+            self.meta = self._load_meta(conn)
+
+    @staticmethod
+    def _has_schema(conn: sqlite3.Connection) -> bool:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'repo_meta'").fetchone() is not None
+
+    @staticmethod
+    def _date_bounds(start: str, end: str) -> tuple:
+        return f"{start}T00:00:00Z", f"{end}T23:59:59Z"
+
+    @staticmethod
+    def _to_commit(row: tuple) -> Dict:
+        sha, date, message, additions, deletions, name, email, login = row
+        return {
+            "sha": sha,
+            "date": date,
+            "message": message,
+            "additions": additions,
+            "deletions": deletions,
+            "author": {"name": name, "email": email, "login": login},
+        }
+
+    @property
+    def newest_date(self) -> Optional[str]:
+        self._refresh_meta()
+        return self.meta["newest_date"]
+
+    @property
+    def paths(self) -> List[str]:
+        return [self.db_path]
+
+    def covers(self, start: str, end: str) -> bool:
+        self._refresh_meta()
+        return any(r_start <= start and end <= r_end for r_start, r_end in self.meta["ranges"])
+
+    def missing(self, start: str, end: str) -> List[List[str]]:
+        """The sub-ranges of [start, end] that still have to be fetched, oldest first."""
+        self._refresh_meta()
+        return _uncovered(self.meta["ranges"], start, end)
+
+    def iter_query(self, start: str, end: str, author: Optional[str] = None) -> Iterator[Dict]:
+        """Stream commits between ISO8601 date strings start and end inclusive, newest first."""
+        sql = (
+            "SELECT sha, date, message, additions, deletions, author_name, author_email, author_login "
+            "FROM commits WHERE repo = ? AND date BETWEEN ? AND ?"
+        )
+        params = [self.repo, *self._date_bounds(start, end)]
+        if author:
+            sql += " AND author = ?"
+            params.append(author)
+        sql += " ORDER BY date DESC"
+        with closing(self._connect()) as conn:
+            # the cursor fetches rows lazily, so only one commit is materialized at a time
+            for row in conn.execute(sql, params):
+                yield self._to_commit(row)
+
+    def query(self, start: str, end: str, author: Optional[str] = None) -> List[Dict]:
+        """Commits between ISO8601 date strings start and end inclusive, newest first like the fetchers."""
+        return list(self.iter_query(start, end, author))
+
+    def authors(self, start: str, end: str) -> List[str]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT author FROM commits "
+                "WHERE repo = ? AND date BETWEEN ? AND ? AND author IS NOT NULL ORDER BY author",
+                (self.repo, *self._date_bounds(start, end)),
+            )
+            return [row[0] for row in rows]
+
+    def search(self, text: str, start: Optional[str] = None, end: Optional[str] = None,
+               author: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """
+        Full-text search over commit messages using FTS5 query syntax, e.g. `"fix crash"` for a phrase
+        or `refact*` for a prefix. Results are ordered by relevance.
+        Raises sqlite3.OperationalError for malformed queries.
+        """
+        sql = (
+            "SELECT c.sha, c.date, c.message, c.author, snippet(commits_fts, 0, '[', ']', '...', 12) "
+            "FROM commits_fts JOIN commits c ON c.id = commits_fts.rowid "
+            "WHERE commits_fts MATCH ? AND c.repo = ?"
+        )
+        params: list = [text, self.repo]
+        if start:
+            sql += " AND c.date >= ?"
+            params.append(f"{start}T00:00:00Z")
+        if end:
+            sql += " AND c.date <= ?"
+            params.append(f"{end}T23:59:59Z")
+        if author:
+            sql += " AND c.author = ?"
+            params.append(author)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        with closing(self._connect()) as conn:
+            return [
+                {
+                    "sha": sha,
+                    "date": date,
+                    "title": message.split("\n")[0],
+                    "author": author_name,
+                    "snippet": snippet,
+                }
+                for sha, date, message, author_name, snippet in conn.execute(sql, params)
+            ]
+
+    def merge(self, commits: Iterable[Dict], start: str, end: str) -> List[Dict]:
+        """
+        Add commits fetched for the [start, end] date range, skipping shas already stored.
+        Returns the newly added commits so derived indexes can be updated incrementally.
+        """
+        # the dedup lookup runs before the insert, so two threads would both count the same commits
+        with self._lock, closing(self._connect()) as conn, conn:
+            # another process (e.g. cache compaction) may have updated the store since we loaded it
+            self.meta = self._load_meta(conn)
+            new_commits = []
+            commits = iter(commits)
+            # dedup and insert in batches so the fetched range never has to be materialized
+            while True:
+                batch = list(islice(commits, 500))
+                if not batch:
+                    break
+                placeholders = ", ".join("?" * len(batch))
+                known = {row[0] for row in conn.execute(
+                    f"SELECT sha FROM commits WHERE repo = ? AND sha IN ({placeholders})",
+                    [self.repo, *(c["sha"] for c in batch)],
+                )}
+                batch_new = []
+                for c in batch:
+                    if c["sha"] not in known:
+                        known.add(c["sha"])
+                        batch_new.append(c)
+
+                conn.executemany(
+                    "INSERT OR IGNORE INTO commits (repo, sha, date, message, additions, deletions, "
+                    "author, author_name, author_email, author_login) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            self.repo, c["sha"], c["date"], c["message"], c["additions"], c["deletions"],
+                            _author_name(c), c["author"].get("name"), c["author"].get("email"),
+                            c["author"].get("login"),
+                        )
+                        for c in batch_new
+                    ],
+                )
+                new_commits.extend(batch_new)
+
+            newest = conn.execute(
+                "SELECT sha, date FROM commits WHERE repo = ? ORDER BY date DESC LIMIT 1", (self.repo,)
+            ).fetchone()
+
+            if newest:
+                self.meta["newest_sha"], self.meta["newest_date"] = newest
+            self.meta["count"] += len(new_commits)
+            self.meta["ranges"] = _merge_ranges(self.meta["ranges"] + [[start, end]])
+            conn.execute(
+                "INSERT OR REPLACE INTO repo_meta (repo, meta) VALUES (?, ?)", (self.repo, json.dumps(self.meta))
+            )
+        return new_commits
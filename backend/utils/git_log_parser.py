@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional
+
+# ASCII record/unit separators never show up in commit metadata, so they are safe delimiters
+RECORD_SEP = "\x1e"
+FIELD_SEP = "\x1f"
+
+# sha, committer timestamp, author name, author email, raw message
+GIT_LOG_FORMAT = "%x1e%H%x1f%ct%x1f%an%x1f%ae%x1f%B%x1f"
+_HEADER_FIELDS = 5
+
+
+def _to_iso(timestamp: str) -> str:
+    """Convert a unix timestamp into the same UTC format GitHub uses for committedDate."""
+    date_obj = datetime.fromtimestamp(int(timestamp), tz=timezone.utc)
+    return date_obj.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _build_commit(header: str, additions: int, deletions: int) -> Dict:
+    sha, timestamp, name, email, message = header.split(FIELD_SEP)[:_HEADER_FIELDS]
+    return {
+        "sha": sha,
+        "date": _to_iso(timestamp),
+        "message": message.strip("\n"),
+        "additions": additions,
+        "deletions": deletions,
+        "author": {
+            "name": name or None,
+            "email": email or None,
+            "login": None,
+        },
+    }
+
+
+def parse_git_log(lines: Iterable[str]) -> Iterator[Dict]:
+    """
+    Incrementally parse `git log --numstat` output produced with GIT_LOG_FORMAT.
+
+    Yields commit records shaped like the ones built from the GitHub API, one at a time,
+    so the caller never needs the whole log in memory.
+    """
+    header: Optional[str] = None
+    header_done = False
+    additions = deletions = 0
+
+    for line in lines:
+        if line.startswith(RECORD_SEP):
+            if header is not None:
+                yield _build_commit(header, additions, deletions)
+            header = line[1:]
+            header_done = header.count(FIELD_SEP) >= _HEADER_FIELDS
+            additions = deletions = 0
+            continue
+
+        if header is None:
+            continue
+
+        if not header_done:
+            # the message body spans several lines until the closing separator
+            header += line
+            header_done = header.count(FIELD_SEP) >= _HEADER_FIELDS
+            continue
+
+        parts = line.rstrip("\n").split("\t", 2)
+        if len(parts) != 3:
+            continue
+        # binary files are reported as "-\t-\tpath"
+        if parts[0].isdigit():
+            additions += int(parts[0])
+        if parts[1].isdigit():
+            deletions += int(parts[1])
+
+    if header is not None:
+        yield _build_commit(header, additions, deletions)
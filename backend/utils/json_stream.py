@@ -0,0 +1,86 @@
+import os
+import json
+from typing import Any, Iterable, Iterator
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Yield the elements of a file holding one top-level JSON array, one at a time.
+
+    Only the current chunk plus the element being decoded is held in memory, so range cache
+    files can be fed into the commit store without loading them whole.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def next_token():
+            """Skip whitespace, reading more of the file as needed. Returns the next character or None at EOF."""
+            nonlocal buffer, pos, eof
+            while True:
+                while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return buffer[pos] if pos < len(buffer) else None
+                buffer, pos = f.read(chunk_size), 0
+                eof = not buffer
+
+        if next_token() != "[":
+            raise ValueError(f"{path} does not hold a JSON array")
+        pos += 1
+        if next_token() == "]":
+            return
+
+        while True:
+            next_token()
+            try:
+                value, end = _DECODER.raw_decode(buffer, pos)
+                # a number cut off by the chunk boundary decodes fine, so also require the delimiter
+                complete = eof or (end < len(buffer) and buffer[end] in _WHITESPACE + ",]")
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            pos = end
+            yield value
+
+            token = next_token()
+            if token == "]":
+                return
+            if token != ",":
+                raise ValueError(f"Expected ',' or ']' in {path}, got {token!r}")
+            pos += 1
+
+
+def write_json_array(path: str, items: Iterable[Any]) -> Iterator[Any]:
+    """
+    Pass items through while writing them to path as one JSON array.
+
+    The array is written to a temporary file that only replaces path once every item has been
+    consumed, so an interrupted fetch never leaves a truncated file that looks like a complete cache.
+    """
+    tmp_path = path + ".tmp"
+    finished = False
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for i, item in enumerate(items):
+                if i:
+                    f.write(", ")
+                json.dump(item, f)
+                yield item
+            f.write("]")
+        finished = True
+        os.replace(tmp_path, path)
+    finally:
+        if not finished and os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -1,3 +1,5 @@
+import heapq
+import math
 from collections import defaultdict
 from datetime import datetime
 
@@ -8,12 +10,7 @@ from .constants import DAY_NAMES
 
 
 def get_authors_from_commit(commits: list):
-    authors = set()
-    for c in commits:
-        name = c["author"].get("name") or c["author"].get("login")
-        if name:
-            authors.add(name)
-    return sorted(list(authors))
+    return run_aggregators(commits, AuthorsAggregator())[0]
 
 
 def get_api_outliers_stdev(commits:list) -> list:
@@ -42,36 +39,185 @@ def get_api_outliers_stdev(commits:list) -> list:
 
 
 def filter_by_metric_type_and_author(commits: list, metric_type: str, author_filter: str = None) -> dict:
-    buckets = defaultdict(int)
-    for c in commits:
-        if author_filter:
+    return run_aggregators(commits, ActivityAggregator(metric_type, author_filter))[0]
+
+
+def extract_words(message: str, stop_words: set) -> list:
+    words = []
+    for w in message.lower().split():
+        w = ''.join(ch for ch in w if ch.isalpha())  # strip punctuation
+        if w and w not in stop_words and len(w) > 2:
+            words.append(w)
+    return words
+
+
+def get_most_frequent_words(commits: list, stop_words: set) -> list:
+    return run_aggregators(commits, WordFrequencyAggregator(stop_words))[0]
+
+
+# --------------------------------------------------------------------------------------
+# Single-pass streaming aggregators. Each one consumes commits one at a time via add() and
+# keeps state that does not grow with the number of commits, so they can run over a
+# generator straight from the commit store.
+# --------------------------------------------------------------------------------------
+
+class AuthorsAggregator:
+
+    def __init__(self):
+        self.authors = set()
+
+    def add(self, c: dict):
+        name = c["author"].get("name") or c["author"].get("login")
+        if name:
+            self.authors.add(name)
+
+    def result(self) -> list:
+        return sorted(self.authors)
+
+
+class OutliersAggregator:
+    """
+    Streaming version of get_api_outliers_stdev. Moments are accumulated as exact integers and only
+    the max_outliers largest commits are retained as candidates, so at most that many are returned.
+    """
+
+    def __init__(self, max_outliers: int = 1000):
+        self.max_outliers = max_outliers
+        self.count = 0
+        self.total = 0
+        self.total_sq = 0
+        self.largest = []  # min-heap of (total_changes, seq, sha, title)
+
+    def add(self, c: dict):
+        tc = c["additions"] + c["deletions"]
+        self.count += 1
+        self.total += tc
+        self.total_sq += tc * tc
+        if len(self.largest) < self.max_outliers:
+            heapq.heappush(self.largest, (tc, self.count, c["sha"], c["message"].split("\n")[0]))
+        elif tc > self.largest[0][0]:
+            heapq.heapreplace(self.largest, (tc, self.count, c["sha"], c["message"].split("\n")[0]))
+
+    def result(self) -> list:
+        if self.count == 0:
+            return []
+        mean = self.total / self.count
+        std = math.sqrt(self.count * self.total_sq - self.total * self.total) / self.count or 1  # avoid div0
+        outliers = []
+        for tc, seq, sha, title in sorted(self.largest, key=lambda entry: entry[1]):
+            z = (tc - mean) / std
+            if z > 2:
+                outliers.append({
+                    "sha": sha,
+                    "title": title,
+                    "total_changes": tc,
+                    "z_score": round(float(z), 2),
+                })
+        # sort descending by z_score
+        outliers.sort(key=lambda x: x["z_score"], reverse=True)
+        return outliers
+
+
+class ActivityAggregator:
+
+    def __init__(self, metric_type: str, author_filter: str = None):
+        self.metric_type = metric_type
+        self.author_filter = author_filter
+        self.buckets = defaultdict(int)
+
+    def add(self, c: dict):
+        if self.author_filter:
             name = c["author"].get("name") or c["author"].get("login")
-            if name != author_filter:
-                continue
+            if name != self.author_filter:
+                return
         date_obj = datetime.fromisoformat(c["date"].replace("Z", "+00:00"))
         day_name = DAY_NAMES[date_obj.weekday()]
 
-        if metric_type == "commits":
-            buckets[day_name] += 1
-        elif metric_type == "additions":
-            buckets[day_name] += c["additions"]
-        elif metric_type == "deletions":
-            buckets[day_name] += c["deletions"]
+        if self.metric_type == "commits":
+            self.buckets[day_name] += 1
+        elif self.metric_type == "additions":
+            self.buckets[day_name] += c["additions"]
+        elif self.metric_type == "deletions":
+            self.buckets[day_name] += c["deletions"]
         else:  # total_changes
-            buckets[day_name] += c["additions"] + c["deletions"]
+            self.buckets[day_name] += c["additions"] + c["deletions"]
 
-    # ensure all days present
-    result = {d: buckets.get(d, 0) for d in DAY_NAMES}
-    return result
+    def result(self) -> dict:
+        # ensure all days present
+        return {d: self.buckets.get(d, 0) for d in DAY_NAMES}
 
 
-def get_most_frequent_words(commits: list, stop_words: set) -> list:
-    words = Counter()
+class WordFrequencyAggregator:
+    """Memory is bounded by the vocabulary, not the number of commits; mode=approx bounds it fully."""
+
+    def __init__(self, stop_words: set):
+        self.stop_words = stop_words
+        self.words = Counter()
+
+    def add(self, c: dict):
+        self.words.update(extract_words(c["message"], self.stop_words))
+
+    def result(self) -> list:
+        return [{"text": w, "value": cnt} for w, cnt in self.words.most_common(200)]
+
+
+def run_aggregators(commits, *aggregators) -> list:
+    """Feed every commit of an iterable through all aggregators in a single pass."""
     for c in commits:
-        msg = c["message"].lower()
-        for w in msg.split():
-            w = ''.join(ch for ch in w if ch.isalpha())  # strip punctuation
-            if w and w not in stop_words and len(w) > 2:
-                words[w] += 1
-    most_common = [{"text": w, "value": cnt} for w, cnt in words.most_common(200)]
-    return most_common
+        for aggregator in aggregators:
+            aggregator.add(c)
+    return [aggregator.result() for aggregator in aggregators]
+
+
+# --------------------------------------------------------------------------------------
+# Approximate variants, computed from a merged CommitSketch (see sketch_index.py)
+# --------------------------------------------------------------------------------------
+
+def get_approx_authors(sketch) -> dict:
+    return {
+        "approximate": True,
+        "distinct_authors": round(sketch.authors.estimate()),
+        "relative_error": round(sketch.authors.relative_error, 4),
+    }
+
+
+def get_approx_outliers(sketch) -> dict:
+    """
+    Same z-score > 2 rule as get_api_outliers_stdev. Mean and standard deviation come from exact
+    moments, candidates from the largest commits kept by the sketch.
+    """
+    quantiles = {f"p{int(q * 100)}": sketch.sizes.quantile(q) for q in (0.5, 0.9, 0.95, 0.99)}
+    if sketch.count == 0:
+        return {"approximate": True, "outliers": [], "threshold": None, "quantiles": quantiles, "complete": True}
+
+    mean = sketch.total / sketch.count
+    std = math.sqrt(max(sketch.total_sq / sketch.count - mean * mean, 0)) or 1  # avoid div0
+    outliers = []
+    for tc, sha, title in sketch.largest:
+        z = (tc - mean) / std
+        if z > 2:
+            outliers.append({
+                "sha": sha,
+                "title": title,
+                "total_changes": tc,
+                "z_score": round(float(z), 2),
+            })
+    outliers.sort(key=lambda x: x["z_score"], reverse=True)
+    # the list is exact unless every retained candidate is an outlier
+    complete = len(outliers) < len(sketch.largest) or sketch.count <= len(sketch.largest)
+    return {
+        "approximate": True,
+        "outliers": outliers,
+        "threshold": round(mean + 2 * std, 2),
+        "quantiles": quantiles,
+        "complete": complete,
+    }
+
+
+def get_approx_most_frequent_words(sketch) -> dict:
+    top = sketch.words.top(200)
+    return {
+        "approximate": True,
+        "words": [{"text": w, "value": cnt, "error": err} for w, cnt, err in top],
+        "max_error": max((err for _, _, err in top), default=0),
+    }
@@ -0,0 +1,176 @@
+import os
+import json
+import heapq
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .service import extract_words
+from .sketches import HyperLogLog, SpaceSaving, TDigest
+
+
+class CommitSketch:
+    """
+    Bounded-size summary of a set of commits: top words, distinct authors, change-size
+    distribution and the largest commits (outlier candidates). Sketches of disjoint sets merge.
+    """
+
+    WORD_CAPACITY = 1000
+    TOP_COMMITS = 100
+
+    def __init__(self):
+        self.words = SpaceSaving(self.WORD_CAPACITY)
+        self.authors = HyperLogLog()
+        self.sizes = TDigest()
+        # exact moments of total_changes, needed for z-scores
+        self.count = 0
+        self.total = 0
+        self.total_sq = 0
+        # min-heap of [total_changes, sha, title] holding the largest commits
+        self.largest: List[list] = []
+
+    def add(self, commit: Dict, stop_words: set):
+        for w in extract_words(commit["message"], stop_words):
+            self.words.add(w)
+        name = commit["author"].get("name") or commit["author"].get("login")
+        if name:
+            self.authors.add(name)
+
+        tc = commit["additions"] + commit["deletions"]
+        self.sizes.add(tc)
+        self.count += 1
+        self.total += tc
+        self.total_sq += tc * tc
+        self._push_largest([tc, commit["sha"], commit["message"].split("\n")[0]])
+
+    def _push_largest(self, entry: list):
+        if len(self.largest) < self.TOP_COMMITS:
+            heapq.heappush(self.largest, entry)
+        elif entry[0] > self.largest[0][0]:
+            heapq.heapreplace(self.largest, entry)
+
+    def merge(self, other: "CommitSketch"):
+        self.words.merge(other.words)
+        self.authors.merge(other.authors)
+        self.sizes.merge(other.sizes)
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        for entry in other.largest:
+            self._push_largest(list(entry))
+
+    def to_dict(self) -> Dict:
+        return {
+            "words": self.words.to_dict(),
+            "authors": self.authors.to_dict(),
+            "sizes": self.sizes.to_dict(),
+            "count": self.count,
+            "total": self.total,
+            "total_sq": self.total_sq,
+            "largest": self.largest,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CommitSketch":
+        sketch = cls()
+        sketch.words = SpaceSaving.from_dict(data["words"])
+        sketch.authors = HyperLogLog.from_dict(data["authors"])
+        sketch.sizes = TDigest.from_dict(data["sizes"])
+        sketch.count = data["count"]
+        sketch.total = data["total"]
+        sketch.total_sq = data["total_sq"]
+        sketch.largest = [list(entry) for entry in data["largest"]]
+        heapq.heapify(sketch.largest)
+        return sketch
+
+
+def _days(start: str, end: str) -> List[str]:
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    return [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+
+class SketchIndex:
+    """
+    One CommitSketch per day, persisted next to the commit cache.
+
+    Range queries merge the per-day sketches, so their cost depends on the number of days rather
+    than the number of commits. Days are built from the commit store the first time they are
+    queried; after that, newly stored commits are folded in through `update`.
+
+    Each store kind ("json", "sqlite") gets its own index, since the two stores fill independently.
+    The index also records the store's commit count it is consistent with; a store that changed
+    behind its back (a compaction, an eviction) no longer matches, and the index is rebuilt instead
+    of folding the refilled commits into days that already count them.
+    """
+
+    def __init__(self, owner: str, repo: str, store_kind: str, cache_dir: str, stop_words: set):
+        self.path = os.path.join(cache_dir, f"sketches_{store_kind}_{owner}_{repo}.json")
+        self.stop_words = stop_words
+        # day -> sketch, None for days that are indexed but had no commits
+        self.days: Dict[str, Optional[CommitSketch]] = {}
+        self.store_count: Optional[int] = None
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            # files written before the store count was recorded cannot be trusted, so start over
+            if "days" in data:
+                self.store_count = data["store_count"]
+                for day, sketch in data["days"].items():
+                    self.days[day] = CommitSketch.from_dict(sketch) if sketch else None
+
+    def _save(self):
+        with open(self.path, "w") as f:
+            json.dump({
+                "store_count": self.store_count,
+                "days": {day: s.to_dict() if s else None for day, s in self.days.items()},
+            }, f)
+
+    def _sync_with_store(self, store_count: int):
+        if store_count != self.store_count:
+            self.days = {}
+            self.store_count = store_count
+
+    def _add_to_day(self, day: str, commit: Dict):
+        if self.days[day] is None:
+            self.days[day] = CommitSketch()
+        self.days[day].add(commit, self.stop_words)
+
+    def update(self, commits: List[Dict], store_count: int):
+        """
+        Fold newly stored commits into the days that are already indexed. store_count is the
+        store's commit count after they were added.
+        """
+        self._sync_with_store(store_count - len(commits))
+        self.store_count = store_count
+        for c in commits:
+            day = c["date"][:10]
+            if day in self.days:
+                self._add_to_day(day, c)
+        if self.days and commits:
+            # also persists the new store count when no indexed day was affected
+            self._save()
+
+    def query(self, start: str, end: str, load_commits: Callable[[str, str], Iterable[Dict]],
+              store_count: int) -> CommitSketch:
+        """
+        Merge the sketches of every day in [start, end]. Days not indexed yet are built from
+        load_commits(first_missing_day, last_missing_day) first; store_count is the store's
+        current commit count.
+        """
+        self._sync_with_store(store_count)
+        days = _days(start, end)
+        missing = [day for day in days if day not in self.days]
+        if missing:
+            for day in missing:
+                self.days[day] = None
+            missing_days = set(missing)
+            for c in load_commits(missing[0], missing[-1]):
+                day = c["date"][:10]
+                if day in missing_days:
+                    self._add_to_day(day, c)
+            self._save()
+
+        merged = CommitSketch()
+        for day in days:
+            if self.days[day] is not None:
+                merged.merge(self.days[day])
+        return merged
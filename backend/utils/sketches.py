@@ -0,0 +1,211 @@
+"""
+Mergeable sketches for approximate analytics over large commit ranges.
+
+Every sketch supports `merge` (so per-day sketches can be combined into any range) and
+`to_dict`/`from_dict` (so they can be persisted as JSON next to the commit cache).
+"""
+import bisect
+import hashlib
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+
+
+class SpaceSaving:
+    """
+    Top-k heavy hitters (Metwally et al.) with the mergeable variant from Agarwal et al.
+
+    Each tracked item keeps (count, error): the true frequency lies in [count - error, count].
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.counters: Dict[str, List[int]] = {}
+
+    def _min_count(self) -> int:
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(count for count, _ in self.counters.values())
+
+    def add(self, item: str, weight: int = 1):
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [weight, 0]
+        else:
+            victim = min(self.counters, key=lambda k: self.counters[k][0])
+            floor = self.counters.pop(victim)[0]
+            self.counters[item] = [floor + weight, floor]
+
+    def merge(self, other: "SpaceSaving"):
+        # an item missing from a full summary may still have occurred up to that summary's minimum
+        own_floor, other_floor = self._min_count(), other._min_count()
+        merged: Dict[str, List[int]] = {}
+        for item in set(self.counters) | set(other.counters):
+            count, error = self.counters.get(item, (own_floor, own_floor))
+            other_count, other_error = other.counters.get(item, (other_floor, other_floor))
+            merged[item] = [count + other_count, error + other_error]
+        if len(merged) > self.capacity:
+            merged = dict(heapq.nlargest(self.capacity, merged.items(), key=lambda kv: kv[1][0]))
+        self.counters = merged
+
+    def top(self, k: int) -> List[Tuple[str, int, int]]:
+        """The k most frequent items as (item, count, error), most frequent first."""
+        items = heapq.nlargest(k, self.counters.items(), key=lambda kv: kv[1][0])
+        return [(item, count, error) for item, (count, error) in items]
+
+    def to_dict(self) -> Dict:
+        return {"capacity": self.capacity, "counters": self.counters}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SpaceSaving":
+        sketch = cls(data["capacity"])
+        sketch.counters = {item: list(counter) for item, counter in data["counters"].items()}
+        return sketch
+
+
+class HyperLogLog:
+    """Distinct counting (Flajolet et al.) with linear counting for small cardinalities."""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of the estimate relative to the true cardinality."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add(self, item: str):
+        h = int.from_bytes(hashlib.sha1(item.encode("utf-8")).digest()[:8], "big")
+        index = h >> (64 - self.precision)
+        remaining = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return raw
+
+    def to_dict(self) -> Dict:
+        # registers are mostly zero for a single day, so store them sparsely
+        return {
+            "precision": self.precision,
+            "registers": [[i, r] for i, r in enumerate(self.registers) if r],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HyperLogLog":
+        sketch = cls(data["precision"])
+        for index, rank in data["registers"]:
+            sketch.registers[index] = rank
+        return sketch
+
+
+class TDigest:
+    """
+    Merging t-digest (Dunning) for quantiles of a stream of numbers.
+
+    Centroids near the tails stay small, so extreme quantiles such as p99 keep a good accuracy.
+    """
+
+    def __init__(self, compression: int = 100):
+        self.compression = compression
+        self.centroids: List[List[float]] = []  # [mean, weight], sorted by mean
+        self.count = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._buffer: List[List[float]] = []
+
+    def add(self, value: float, weight: float = 1.0):
+        self._buffer.append([float(value), weight])
+        self.count += weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self._buffer) >= self.compression * 5:
+            self._compress()
+
+    def merge(self, other: "TDigest"):
+        other._compress()
+        self._buffer.extend([mean, weight] for mean, weight in other.centroids)
+        self.count += other.count
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(self.centroids + self._buffer, key=lambda c: c[0])
+        self._buffer = []
+        merged: List[List[float]] = [list(points[0])]
+        seen = 0.0
+        q_limit = self._q_limit(0.0)
+        for mean, weight in points[1:]:
+            last = merged[-1]
+            if (seen + last[1] + weight) / self.count <= q_limit:
+                last[0] += (mean - last[0]) * weight / (last[1] + weight)
+                last[1] += weight
+            else:
+                seen += last[1]
+                q_limit = self._q_limit(seen / self.count)
+                merged.append([mean, weight])
+        self.centroids = merged
+
+    def _q_limit(self, q: float) -> float:
+        """Largest quantile a centroid starting at q may reach under the k1 scale function."""
+        k = self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+        k_next = min(k + 1, self.compression / 4)
+        return (math.sin(k_next * 2 * math.pi / self.compression) + 1) / 2
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        target = q * self.count
+        # cumulative weight at each centroid's centre
+        centres = []
+        cumulative = 0.0
+        for _, weight in self.centroids:
+            centres.append(cumulative + weight / 2)
+            cumulative += weight
+        if target <= centres[0]:
+            return self.min
+        if target >= centres[-1]:
+            return self.max
+        i = bisect.bisect_right(centres, target)
+        left, right = self.centroids[i - 1][0], self.centroids[i][0]
+        fraction = (target - centres[i - 1]) / (centres[i] - centres[i - 1])
+        return left + (right - left) * fraction
+
+    def to_dict(self) -> Dict:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "centroids": self.centroids,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TDigest":
+        sketch = cls(data["compression"])
+        sketch.centroids = [list(c) for c in data["centroids"]]
+        sketch.count = data["count"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
@@ -0,0 +1,162 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from backend.utils.cache_manager import TOUCH_INTERVAL, CacheManager, split_repo_key
+from backend.utils.commit_store import JsonCommitStore, SqliteCommitStore
+
+
+def _commit(sha, date):
+    return {
+        "sha": sha,
+        "date": date,
+        "message": f"Commit {sha}",
+        "additions": 1,
+        "deletions": 1,
+        "author": {"name": "Alice", "email": None, "login": None},
+    }
+
+
+class TestCacheManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        # two overlapping ranges sharing commit "b"
+        self._write("commits_owner_my_repo_2024-01-01_2024-01-16.json", [
+            _commit("b", "2024-01-16T10:00:00Z"),
+            _commit("a", "2024-01-15T10:00:00Z"),
+        ], age=300)
+        self._write("commits_owner_my_repo_2024-01-10_2024-01-31.json", [
+            _commit("c", "2024-01-20T10:00:00Z"),
+            _commit("b", "2024-01-16T10:00:00Z"),
+        ], age=200)
+        self._write("sketches_json_owner_my_repo.json", {}, age=100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, fname, data, age=0):
+        path = os.path.join(self.dir, fname)
+        with open(path, "w") as f:
+            json.dump(data, f)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def _names(self, entries):
+        return [e["name"] for e in entries]
+
+    def test_entries_sorted_least_recently_used_first(self):
+        """Test that entries fall back to mtime and touch() moves them to the end."""
+        manager = CacheManager(self.dir)
+        names = self._names(manager.entries())
+        self.assertEqual(names[0], "commits_owner_my_repo_2024-01-01_2024-01-16.json")
+        manager.touch(os.path.join(self.dir, names[0]))
+        self.assertEqual(self._names(manager.entries())[-1], names[0])
+
+    def test_touch_throttles_manifest_writes(self):
+        """Test that repeated accesses within TOUCH_INTERVAL do not rewrite the manifest."""
+        manager = CacheManager(self.dir)
+        path = os.path.join(self.dir, "sketches_json_owner_my_repo.json")
+        manager.touch(path)
+        first = manager.last_access["repo_owner_my_repo"]
+        os.remove(manager.manifest_path)
+        manager.touch(path)
+        self.assertFalse(os.path.exists(manager.manifest_path))
+        self.assertEqual(manager.last_access["repo_owner_my_repo"], first)
+
+        manager.last_access["repo_owner_my_repo"] -= TOUCH_INTERVAL
+        manager.touch(path)
+        self.assertTrue(os.path.exists(manager.manifest_path))
+        self.assertGreater(manager.last_access["repo_owner_my_repo"], first - TOUCH_INTERVAL)
+
+    def test_store_files_form_one_entry(self):
+        """Test that a store's data and meta files and its sketches are sized and evicted together."""
+        store = JsonCommitStore("owner", "my_repo", self.dir)
+        store.merge([_commit("a", "2024-01-15T10:00:00Z")], "2024-01-01", "2024-01-15")
+        files = store.paths + [os.path.join(self.dir, "sketches_json_owner_my_repo.json")]
+        entries = [e for e in CacheManager(self.dir).entries() if e["kind"] == "store"]
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(sorted(entries[0]["files"]), sorted(files))
+        self.assertEqual(entries[0]["size"], sum(os.path.getsize(p) for p in files))
+
+    def test_evicting_store_drops_its_sketches(self):
+        """Test that sketches never outlive the store they were built from."""
+        store = JsonCommitStore("owner", "my_repo", self.dir)
+        store.merge([_commit("a", "2024-01-15T10:00:00Z")], "2024-01-01", "2024-01-15")
+        manager = CacheManager(self.dir)
+        # the sketches were used most recently, the store itself least recently
+        manager.touch(os.path.join(self.dir, "sketches_json_owner_my_repo.json"))
+        manager.prune(0, protected=[os.path.join(self.dir, "commits_owner_my_repo_2024-01-10_2024-01-31.json")])
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "sketches_json_owner_my_repo.json")))
+        self.assertFalse(any(os.path.exists(p) for p in store.paths))
+
+    def test_evicting_sqlite_drops_sketches(self):
+        """Test that sketches built from the SQLite store leave together with the database."""
+        db_path = os.path.join(self.dir, "commits.sqlite3")
+        SqliteCommitStore("owner", "my_repo", db_path).merge([_commit("a", "2024-01-15T10:00:00Z")], "2024-01-01", "2024-01-15")
+        sketches = self._write("sketches_sqlite_owner_my_repo.json", {}, age=1000)
+        os.utime(db_path, (time.time() - 1000, time.time() - 1000))
+        evicted = CacheManager(self.dir).prune(os.path.getsize(db_path) - 1)
+        self.assertEqual(self._names(evicted), ["commits.sqlite3"])
+        self.assertFalse(os.path.exists(sketches))
+
+    def test_prune_evicts_lru_until_within_budget(self):
+        """Test that the oldest entries go first and eviction stops at the budget."""
+        manager = CacheManager(self.dir)
+        sizes = {e["name"]: e["size"] for e in manager.entries()}
+        budget = sum(sizes.values()) - 1
+        evicted = manager.prune(budget)
+        self.assertEqual(self._names(evicted), ["commits_owner_my_repo_2024-01-01_2024-01-16.json"])
+        self.assertLessEqual(manager.stats()["total_bytes"], budget)
+
+    def test_prune_skips_protected_entries(self):
+        """Test that protected paths survive even when over budget."""
+        manager = CacheManager(self.dir)
+        protected = os.path.join(self.dir, "sketches_json_owner_my_repo.json")
+        manager.prune(0, protected=[protected])
+        self.assertEqual(self._names(manager.entries()), ["repo_owner_my_repo"])
+
+    def test_prune_without_budget_is_noop(self):
+        """Test that no budget means nothing is evicted."""
+        self.assertEqual(CacheManager(self.dir).prune(), [])
+        self.assertEqual(len(CacheManager(self.dir).entries()), 3)
+
+    def test_compact_dedups_ranges_into_store(self):
+        """Test that overlapping range files become one deduplicated store covering both ranges."""
+        manager = CacheManager(self.dir)
+        summary = manager.compact(lambda owner, repo: JsonCommitStore(owner, repo, self.dir))
+        self.assertEqual(summary["owner_my_repo"]["files"], 2)
+        self.assertEqual(summary["owner_my_repo"]["commits"], 4)
+        self.assertEqual(summary["owner_my_repo"]["new_commits"], 3)
+
+        store = JsonCommitStore("owner", "my_repo", self.dir)
+        self.assertEqual([c["sha"] for c in store.query("2024-01-01", "2024-01-31")], ["c", "b", "a"])
+        self.assertTrue(store.covers("2024-01-01", "2024-01-31"))
+        self.assertEqual([e["kind"] for e in manager.entries() if e["kind"] == "range"], [])
+
+    def test_compact_into_sqlite(self):
+        """Test that compaction also works with the SQLite store."""
+        db_path = os.path.join(self.dir, "commits.sqlite3")
+        CacheManager(self.dir).compact(lambda owner, repo: SqliteCommitStore(owner, repo, db_path))
+        store = SqliteCommitStore("owner", "my_repo", db_path)
+        self.assertEqual(store.meta["count"], 3)
+        self.assertTrue(store.covers("2024-01-05", "2024-01-25"))
+
+    def test_stats_by_kind(self):
+        """Test that stats aggregate entries and bytes per kind."""
+        stats = CacheManager(self.dir, max_bytes=1024).stats()
+        self.assertEqual(stats["entries"], 3)
+        self.assertEqual(stats["by_kind"]["range"]["entries"], 2)
+        self.assertEqual(stats["max_bytes"], 1024)
+
+    def test_split_repo_key(self):
+        """Test that repo names with underscores survive the round trip."""
+        self.assertEqual(split_repo_key("OpenRA_my_repo"), ("OpenRA", "my_repo"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
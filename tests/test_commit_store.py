@@ -0,0 +1,278 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from backend.utils.commit_store import JsonCommitStore, SqliteCommitStore, _iter_lines_reversed
+
+
+def _commit(sha, date, name="Alice", message=None):
+    return {
+        "sha": sha,
+        "date": date,
+        "message": message or f"Commit {sha}",
+        "additions": 1,
+        "deletions": 1,
+        "author": {"name": name, "email": None, "login": None},
+    }
+
+
+class CommitStoreTests:
+    """Behaviour shared by every commit store implementation."""
+
+    def make_store(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = self.make_store()
+        # fetchers return newest first
+        self.store.merge([
+            _commit("b", "2024-01-16T10:00:00Z", name="Bob"),
+            _commit("a", "2024-01-15T10:00:00Z"),
+        ], "2024-01-01", "2024-01-16")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _stored_shas(self):
+        return [c["sha"] for c in reversed(self.store.query("2000-01-01", "2100-01-01"))]
+
+    def test_tracks_newest_commit(self):
+        """Test that the newest ingested commit is recorded for the next sync."""
+        self.assertEqual(self.store.meta["newest_sha"], "b")
+        self.assertEqual(self.store.newest_date, "2024-01-16T10:00:00Z")
+
+    def test_dedups_by_sha(self):
+        """Test that re-fetched commits are not stored twice."""
+        added = self.store.merge([
+            _commit("c", "2024-01-17T10:00:00Z"),
+            _commit("b", "2024-01-16T10:00:00Z"),
+        ], "2024-01-16", "2024-01-17")
+        self.assertEqual([c["sha"] for c in added], ["c"])
+        self.assertEqual(self._stored_shas(), ["a", "b", "c"])
+        self.assertEqual(self.store.meta["count"], 3)
+
+    def test_query_filters_by_author(self):
+        """Test that the author filter matches name (or login) exactly."""
+        result = self.store.query("2024-01-01", "2024-01-31", author="Bob")
+        self.assertEqual([c["sha"] for c in result], ["b"])
+
+    def test_authors_within_range(self):
+        """Test that distinct authors are returned sorted and date-filtered."""
+        self.assertEqual(self.store.authors("2024-01-01", "2024-01-31"), ["Alice", "Bob"])
+        self.assertEqual(self.store.authors("2024-01-15", "2024-01-15"), ["Alice"])
+
+    def test_iter_query_streams_records(self):
+        """Test that iter_query is lazy and yields the same commits as query."""
+        stream = self.store.iter_query("2024-01-01", "2024-01-31", author="Alice")
+        self.assertFalse(isinstance(stream, list))
+        self.assertEqual(list(stream), self.store.query("2024-01-01", "2024-01-31", author="Alice"))
+
+    def test_iter_query_streams_newest_first(self):
+        """Test that every store streams in the same order as query(), newest first."""
+        self.store.merge([_commit("c", "2024-01-17T10:00:00Z")], "2024-01-16", "2024-01-17")
+        self.assertEqual([c["sha"] for c in self.store.iter_query("2024-01-01", "2024-01-31")], ["c", "b", "a"])
+
+    def test_merge_consumes_a_stream(self):
+        """Test that merge takes a one-shot generator, including backfilled and repeated commits."""
+        stream = (c for c in [
+            _commit("c", "2024-01-17T10:00:00Z"),
+            _commit("a", "2024-01-15T10:00:00Z"),
+            _commit("z", "2023-12-20T10:00:00Z"),
+            _commit("z", "2023-12-20T10:00:00Z"),
+        ])
+        added = self.store.merge(stream, "2023-12-01", "2024-01-17")
+        self.assertEqual(sorted(c["sha"] for c in added), ["c", "z"])
+        self.assertEqual(self._stored_shas(), ["z", "a", "b", "c"])
+        self.assertEqual(self.store.meta["count"], 4)
+
+    def test_concurrent_merges_store_each_commit_once(self):
+        """Test that merges racing from two threads neither duplicate commits nor miscount them."""
+        commits = [_commit(f"s{i}", f"2024-02-{i % 28 + 1:02d}T10:00:00Z") for i in range(200)]
+        # both merges reach their first commit together unless one of them is kept out
+        barrier = threading.Barrier(2)
+
+        def stream():
+            try:
+                barrier.wait(timeout=0.5)
+            except threading.BrokenBarrierError:
+                pass
+            yield from commits
+
+        added = []
+        threads = [
+            threading.Thread(target=lambda: added.append(len(self.store.merge(stream(), "2024-02-01", "2024-02-28"))))
+            for _ in range(2)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(sorted(added), [0, 200])
+        self.assertEqual(len(self.store.query("2024-02-01", "2024-02-28")), 200)
+        self.assertEqual(self.store.meta["count"], 202)
+
+    def test_query_returns_full_records(self):
+        """Test that stored commits round-trip unchanged."""
+        result = self.store.query("2024-01-15", "2024-01-15")
+        self.assertEqual(result, [_commit("a", "2024-01-15T10:00:00Z")])
+
+    def test_older_commits_keep_date_order(self):
+        """Test that backfilled history is merged in date order."""
+        self.store.merge([_commit("z", "2023-12-20T10:00:00Z")], "2023-12-01", "2023-12-31")
+        self.assertEqual(self._stored_shas(), ["z", "a", "b"])
+        self.assertEqual(self.store.meta["newest_sha"], "b")
+
+    def test_covers_merged_ranges(self):
+        """Test that overlapping fetched ranges combine into one covered range."""
+        self.store.merge([], "2024-01-10", "2024-01-31")
+        self.assertTrue(self.store.covers("2024-01-05", "2024-01-31"))
+        self.assertFalse(self.store.covers("2023-12-31", "2024-01-05"))
+        self.assertFalse(self.store.covers("2024-01-20", "2024-02-01"))
+
+    def test_sees_ranges_added_by_another_process(self):
+        """Test that ranges merged elsewhere, e.g. by cache compaction, count as covered."""
+        self.make_store().merge([_commit("c", "2024-02-01T10:00:00Z")], "2024-02-01", "2024-02-10")
+        self.assertTrue(self.store.covers("2024-02-01", "2024-02-10"))
+        self.assertEqual(self.store.newest_date, "2024-02-01T10:00:00Z")
+
+    def test_evicted_store_is_no_longer_covering(self):
+        """Test that a store deleted behind the running instance's back is refetched, not served empty."""
+        for path in self.store.paths:
+            os.remove(path)
+        self.assertFalse(self.store.covers("2024-01-01", "2024-01-16"))
+        self.assertEqual(self.store.missing("2024-01-01", "2024-01-16"), [["2024-01-01", "2024-01-16"]])
+        self.assertIsNone(self.store.newest_date)
+        self.store.merge([_commit("a", "2024-01-15T10:00:00Z")], "2024-01-01", "2024-01-16")
+        self.assertEqual(self._stored_shas(), ["a"])
+        self.assertEqual(self.store.meta["count"], 1)
+
+    def test_adjacent_ranges_join(self):
+        """Test that a range starting the day after a covered one extends it."""
+        self.store.merge([], "2024-01-17", "2024-01-31")
+        self.assertEqual(self.store.meta["ranges"], [["2024-01-01", "2024-01-31"]])
+        self.assertTrue(self.store.covers("2024-01-10", "2024-01-20"))
+
+    def test_missing_sub_ranges(self):
+        """Test that only the uncovered days of a request are reported for fetching."""
+        self.store.merge([], "2024-01-20", "2024-01-25")
+        self.assertEqual(self.store.missing("2024-01-05", "2024-01-16"), [])
+        self.assertEqual(self.store.missing("2023-12-30", "2024-01-31"), [
+            ["2023-12-30", "2023-12-31"], ["2024-01-17", "2024-01-19"], ["2024-01-26", "2024-01-31"],
+        ])
+        # the default view moving forward by a day only misses the new day
+        self.assertEqual(self.store.missing("2024-01-02", "2024-01-17"), [["2024-01-17", "2024-01-17"]])
+
+    def test_query_filters_by_date_newest_first(self):
+        """Test that queries return the requested days only, newest first."""
+        result = self.store.query("2024-01-16", "2024-01-16")
+        self.assertEqual([c["sha"] for c in result], ["b"])
+        result = self.store.query("2024-01-01", "2024-01-31")
+        self.assertEqual([c["sha"] for c in result], ["b", "a"])
+
+
+class TestJsonCommitStore(CommitStoreTests, unittest.TestCase):
+
+    def make_store(self):
+        return JsonCommitStore("owner", "repo", self.tmp.name)
+
+    def test_reverse_line_reader_across_blocks(self):
+        """Test that lines split over block boundaries are reassembled when reading backwards."""
+        path = os.path.join(self.tmp.name, "lines.txt")
+        lines = [f"line number {i}" for i in range(50)]
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        result = [line for line in _iter_lines_reversed(path, block_size=7) if line]
+        self.assertEqual(result, list(reversed(lines)))
+
+    def test_query_skips_newer_lines_without_decoding(self):
+        """Test that commits after the requested range are passed over without parsing them."""
+        self.store.merge([_commit(f"n{i}", f"2024-02-{i + 1:02d}T10:00:00Z") for i in range(20)], "2024-02-01", "2024-02-20")
+        with mock.patch("backend.utils.commit_store.json.loads", wraps=json.loads) as loads:
+            result = self.store.query("2024-01-15", "2024-01-15")
+        self.assertEqual([c["sha"] for c in result], ["a"])
+        self.assertEqual(loads.call_count, 1)
+
+    def test_query_decodes_lines_in_another_key_order(self):
+        """Test that records not written by merge() are still filtered by their date."""
+        with open(self.store.data_path, "a") as f:
+            f.write(json.dumps({"date": "2024-01-17T10:00:00Z", **_commit("x", "2024-01-17T10:00:00Z")}) + "\n")
+        self.assertEqual([c["sha"] for c in self.store.query("2024-01-16", "2024-01-16")], ["b"])
+        self.assertEqual([c["sha"] for c in self.store.query("2024-01-17", "2024-01-17")], ["x"])
+
+    def test_newer_commits_are_appended(self):
+        """Test that an incremental sync only appends to the data file."""
+        with open(self.store.data_path) as f:
+            before = f.read()
+        self.store.merge([_commit("c", "2024-01-17T10:00:00Z")], "2024-01-16", "2024-01-17")
+        with open(self.store.data_path) as f:
+            after = f.read()
+        self.assertTrue(after.startswith(before))
+
+    def test_state_persists_across_instances(self):
+        """Test that a new store instance picks up the saved sync state."""
+        reopened = JsonCommitStore("owner", "repo", self.tmp.name)
+        self.assertEqual(reopened.meta, self.store.meta)
+        with open(reopened.meta_path) as f:
+            self.assertEqual(json.load(f)["ranges"], [["2024-01-01", "2024-01-16"]])
+        self.assertTrue(os.path.exists(reopened.data_path))
+
+
+class TestSqliteCommitStore(CommitStoreTests, unittest.TestCase):
+
+    def make_store(self):
+        return SqliteCommitStore("owner", "repo", os.path.join(self.tmp.name, "commits.sqlite3"))
+
+    def _add_messages(self):
+        self.store.merge([
+            _commit("c", "2024-01-17T10:00:00Z", message="Fix crash in map editor"),
+            _commit("d", "2024-01-18T10:00:00Z", name="Bob", message="Refactor map loading; fix leak"),
+            _commit("e", "2024-01-19T10:00:00Z", message="Crash fix for the map"),
+        ], "2024-01-16", "2024-01-19")
+
+    def test_state_persists_across_instances(self):
+        """Test that a new store instance picks up the saved sync state."""
+        reopened = self.make_store()
+        self.assertEqual(reopened.meta, self.store.meta)
+        self.assertEqual(reopened.meta["ranges"], [["2024-01-01", "2024-01-16"]])
+
+    def test_search_phrase(self):
+        """Test that quoted queries match the exact phrase only."""
+        self._add_messages()
+        result = self.store.search('"fix crash"')
+        self.assertEqual([r["sha"] for r in result], ["c"])
+
+    def test_search_prefix(self):
+        """Test that a trailing star matches word prefixes."""
+        self._add_messages()
+        result = self.store.search("refact*")
+        self.assertEqual([r["sha"] for r in result], ["d"])
+        self.assertEqual(result[0]["title"], "Refactor map loading; fix leak")
+
+    def test_search_with_date_and_author_filters(self):
+        """Test that search results honour the date range and author."""
+        self._add_messages()
+        result = self.store.search("map", start="2024-01-18", end="2024-01-19")
+        self.assertEqual(sorted(r["sha"] for r in result), ["d", "e"])
+        result = self.store.search("map", author="Bob")
+        self.assertEqual([r["sha"] for r in result], ["d"])
+
+    def test_search_is_scoped_to_repo(self):
+        """Test that commits of another repo in the same database are not returned."""
+        self._add_messages()
+        other = SqliteCommitStore("owner", "other", self.store.db_path)
+        self.assertEqual(other.search("map"), [])
+
+    def test_invalid_search_raises(self):
+        """Test that malformed FTS5 syntax surfaces as an OperationalError."""
+        with self.assertRaises(sqlite3.OperationalError):
+            self.store.search('"unterminated')
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
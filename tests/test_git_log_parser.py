@@ -0,0 +1,58 @@
+import unittest
+
+from backend.utils.git_log_parser import parse_git_log
+
+
+def _record(sha, timestamp, name, email, message, numstat):
+    header = f"\x1e{sha}\x1f{timestamp}\x1f{name}\x1f{email}\x1f{message}\x1f\n"
+    return header + "\n" + "".join(f"{line}\n" for line in numstat)
+
+
+class TestParseGitLog(unittest.TestCase):
+
+    def setUp(self):
+        """Build raw `git log --numstat` output with two commits."""
+        raw = _record(
+            "abc123", "1705314600", "Alice", "alice@example.com",
+            "Fix critical bug\n\nThis resolves the login issue\n",
+            ["10\t2\tsrc/auth.py", "5\t1\tsrc/login.py", "-\t-\tassets/logo.png"],
+        ) + _record(
+            "def456", "1705414800", "", "", "Merge branch 'main'", [],
+        )
+        self.lines = raw.splitlines(keepends=True)
+
+    def test_parses_all_commits(self):
+        """Test that one record is produced per commit."""
+        result = list(parse_git_log(self.lines))
+        self.assertEqual([c["sha"] for c in result], ["abc123", "def456"])
+
+    def test_sums_numstat_and_skips_binary_files(self):
+        """Test that additions/deletions are summed and binary entries ignored."""
+        commit = next(parse_git_log(self.lines))
+        self.assertEqual(commit["additions"], 15)
+        self.assertEqual(commit["deletions"], 3)
+
+    def test_keeps_multiline_message(self):
+        """Test that the full message body survives line-by-line parsing."""
+        commit = next(parse_git_log(self.lines))
+        self.assertEqual(commit["message"], "Fix critical bug\n\nThis resolves the login issue")
+
+    def test_converts_timestamp_to_utc_iso(self):
+        """Test that dates match the GitHub committedDate format."""
+        commit = next(parse_git_log(self.lines))
+        self.assertEqual(commit["date"], "2024-01-15T10:30:00Z")
+
+    def test_commit_without_numstat_and_author(self):
+        """Test merge-like commits with no file stats and empty author fields."""
+        commit = list(parse_git_log(self.lines))[1]
+        self.assertEqual(commit["additions"], 0)
+        self.assertEqual(commit["deletions"], 0)
+        self.assertEqual(commit["author"], {"name": None, "email": None, "login": None})
+
+    def test_empty_input(self):
+        """Test that empty output yields no commits."""
+        self.assertEqual(list(parse_git_log([])), [])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+import unittest
+
+from backend.utils.json_stream import iter_json_array, write_json_array
+
+
+class TestJsonStream(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "commits.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _dump(self, data, indent=None):
+        with open(self.path, "w") as f:
+            json.dump(data, f, indent=indent)
+
+    def test_reads_elements_across_chunk_boundaries(self):
+        """Test that elements split over chunks, including numbers, decode unchanged."""
+        data = [{"sha": str(i), "message": 'says "]," here', "additions": 12345} for i in range(20)]
+        data += [1234567, 2.5e10, None, [], {}]
+        for indent in (None, 2):
+            self._dump(data, indent)
+            for chunk_size in (1, 3, 64):
+                self.assertEqual(list(iter_json_array(self.path, chunk_size)), data)
+
+    def test_empty_array(self):
+        """Test that an empty array yields nothing."""
+        self._dump([])
+        self.assertEqual(list(iter_json_array(self.path)), [])
+
+    def test_truncated_file_raises(self):
+        """Test that a cut-off file is reported instead of silently yielding a prefix."""
+        with open(self.path, "w") as f:
+            f.write('[{"sha": "a"}, {"sha": ')
+        with self.assertRaises(ValueError):
+            list(iter_json_array(self.path, 4))
+
+    def test_write_passes_items_through(self):
+        """Test that the written file holds exactly the items that streamed past."""
+        items = [{"sha": "a"}, {"sha": "b"}]
+        self.assertEqual(list(write_json_array(self.path, iter(items))), items)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), items)
+
+    def test_abandoned_write_leaves_no_file(self):
+        """Test that stopping early never leaves a partial file behind."""
+        stream = write_json_array(self.path, iter([{"sha": "a"}, {"sha": "b"}]))
+        next(stream)
+        stream.close()
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
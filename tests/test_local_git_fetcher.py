@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# the fetchers import their siblings as top-level modules, the same way backend/app.py does
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import local_git_fetcher  # noqa: E402
+from backend.utils.commit_store import JsonCommitStore  # noqa: E402
+
+
+class TestSyncAfterMergedBranch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self.tmp.name, "repo")
+        os.makedirs(self.repo)
+        self._git("init", "-q", "-b", "main")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _git(self, *args, date=None):
+        env = dict(os.environ, GIT_AUTHOR_NAME="Alice", GIT_AUTHOR_EMAIL="alice@example.com",
+                   GIT_COMMITTER_NAME="Alice", GIT_COMMITTER_EMAIL="alice@example.com")
+        if date:
+            env["GIT_AUTHOR_DATE"] = env["GIT_COMMITTER_DATE"] = date
+        subprocess.run(["git", "-C", self.repo, *args], check=True, env=env, capture_output=True)
+
+    def _commit(self, fname, message, date):
+        with open(os.path.join(self.repo, fname), "w") as f:
+            f.write(message + "\n")
+        self._git("add", fname)
+        self._git("commit", "-q", "-m", message, date=date)
+
+    def test_sync_picks_up_older_commits_from_merged_branch(self):
+        """Test that a branch merged after a sync is ingested even though its commits are older."""
+        self._commit("a.txt", "first", "2024-01-10T10:00:00Z")
+        self._git("checkout", "-q", "-b", "late")
+        self._commit("late.txt", "late branch work", "2024-01-13T10:00:00Z")
+        self._git("checkout", "-q", "main")
+        self._commit("b.txt", "second", "2024-01-14T10:00:00Z")
+
+        store = JsonCommitStore("owner", "repo", self.tmp.name)
+        store.merge(local_git_fetcher.get_commits_since(self.repo, "2024-01-01T00:00:00Z"), "2024-01-01", "2024-01-14")
+        self.assertEqual(store.newest_date, "2024-01-14T10:00:00Z")
+
+        self._git("merge", "-q", "--no-ff", "-m", "merge late", "late", date="2024-01-20T10:00:00Z")
+        new_commits = store.merge(local_git_fetcher.get_commits_after(self.repo, store.meta["newest_sha"]),
+                                  store.newest_date[:10], "2024-01-20")
+
+        self.assertEqual(sorted(c["message"] for c in new_commits), ["late branch work", "merge late"])
+        self.assertIn("late branch work", [c["message"] for c in store.query("2024-01-13", "2024-01-13")])
+
+    def _merge_with_branch(self):
+        self._commit("a.txt", "first", "2024-01-10T10:00:00Z")
+        self._git("checkout", "-q", "-b", "feature")
+        self._commit("feature.txt", "feature work", "2024-01-11T10:00:00Z")
+        self._git("checkout", "-q", "main")
+        # three lines on main, one on the branch, so the two sides of the merge differ in size
+        self._commit("b.txt", "second\nthird\nfourth", "2024-01-12T10:00:00Z")
+        self._git("merge", "-q", "--no-ff", "-m", "merge feature", "feature", date="2024-01-13T10:00:00Z")
+        return list(local_git_fetcher._iter_git_log(self.repo, None, None))
+
+    def test_merge_reports_first_parent_diff(self):
+        """Test that merges carry their diff against the first parent, like the GitHub source."""
+        commits = self._merge_with_branch()
+        self.assertEqual(len(commits), 4)
+        self.assertEqual((commits[0]["message"], commits[0]["additions"], commits[0]["deletions"]), ("merge feature", 1, 0))
+
+    def test_merge_diff_fallback_for_old_git(self):
+        """Test that the -m fallback yields every merge once, with its first-parent diff."""
+        with mock.patch.object(local_git_fetcher, "_merge_diff_options", return_value=["-m"]):
+            commits = self._merge_with_branch()
+        self.assertEqual([c["message"] for c in commits].count("merge feature"), 1)
+        self.assertEqual(len(commits), 4)
+        self.assertEqual(commits[0]["additions"], 1)
+
+    def test_stopping_early_does_not_leave_git_running(self):
+        """Test that abandoning the stream terminates the git process cleanly."""
+        self._commit("a.txt", "first", "2024-01-10T10:00:00Z")
+        self._commit("b.txt", "second", "2024-01-11T10:00:00Z")
+        stream = local_git_fetcher._iter_git_log(self.repo, None, None)
+        self.assertEqual(next(stream)["message"], "second")
+        stream.close()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
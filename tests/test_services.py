@@ -8,6 +8,11 @@ from backend.utils.service import (
     get_api_outliers_stdev,
     filter_by_metric_type_and_author,
     get_most_frequent_words,
+    AuthorsAggregator,
+    OutliersAggregator,
+    ActivityAggregator,
+    WordFrequencyAggregator,
+    run_aggregators,
 )
 from backend.utils.constants import DAY_NAMES
 import unittest
@@ -465,5 +470,55 @@ class TestIntegrationScenarios(TestGitAnalyticsFunctions):
         self.assertLessEqual(len(words), 200)
 
 
+class TestStreamingAggregators(TestGitAnalyticsFunctions):
+
+    def _large_commits(self):
+        for i in range(1000):
+            yield {
+                "sha": f"sha{i}",
+                "author": {"name": f"Author{i % 10}"},
+                "message": f"Commit message {i} with various words",
+                "date": f"2024-01-{(i % 28) + 1:02d}T10:00:00Z",
+                "additions": (i * 37) % 100 if i % 97 else 5000,
+                "deletions": i % 50
+            }
+
+    def test_single_pass_over_generator(self):
+        """Test that all aggregators share one pass over a generator and match the list functions."""
+        commits = list(self._large_commits())
+        authors, outliers, activity, words = run_aggregators(
+            self._large_commits(),
+            AuthorsAggregator(),
+            OutliersAggregator(),
+            ActivityAggregator("total_changes"),
+            WordFrequencyAggregator({"with", "various"}),
+        )
+        self.assertEqual(authors, get_authors_from_commit(commits))
+        self.assertEqual(outliers, get_api_outliers_stdev(commits))
+        self.assertEqual(activity, filter_by_metric_type_and_author(commits, "total_changes"))
+        self.assertEqual(words, get_most_frequent_words(commits, {"with", "various"}))
+
+    def test_outliers_match_exact_on_sample(self):
+        """Test that streaming outliers equal the numpy implementation."""
+        aggregator = OutliersAggregator()
+        result = run_aggregators(iter(self.sample_commits), aggregator)[0]
+        self.assertEqual(result, get_api_outliers_stdev(self.sample_commits))
+
+    def test_outliers_candidates_are_bounded(self):
+        """Test that only max_outliers candidates are kept, keeping the largest ones."""
+        aggregator = OutliersAggregator(max_outliers=3)
+        result = run_aggregators(self._large_commits(), aggregator)[0]
+        self.assertEqual(len(aggregator.largest), 3)
+        self.assertEqual(len(result), 3)
+        self.assertTrue(all(o["total_changes"] >= 5000 for o in result))
+
+    def test_empty_stream(self):
+        """Test that aggregators handle an empty stream."""
+        result = run_aggregators(iter([]), AuthorsAggregator(), OutliersAggregator(), ActivityAggregator("commits"))
+        self.assertEqual(result[0], [])
+        self.assertEqual(result[1], [])
+        self.assertEqual(sum(result[2].values()), 0)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
\ No newline at end of file
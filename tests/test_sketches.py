@@ -0,0 +1,223 @@
+import json
+import random
+import tempfile
+import unittest
+
+from backend.utils.service import (
+    get_api_outliers_stdev,
+    get_authors_from_commit,
+    get_most_frequent_words,
+    get_approx_authors,
+    get_approx_outliers,
+    get_approx_most_frequent_words,
+)
+from backend.utils.sketch_index import CommitSketch, SketchIndex
+from backend.utils.sketches import HyperLogLog, SpaceSaving, TDigest
+
+
+def _commits(n, seed=7):
+    rng = random.Random(seed)
+    vocab = ["refactor", "crash", "editor", "network", "sound", "balance", "lint", "docs"]
+    commits = []
+    for i in range(n):
+        size = rng.randint(1, 60) if i % 50 else rng.randint(2000, 5000)
+        commits.append({
+            "sha": f"sha{i}",
+            "date": f"2024-01-{(i % 28) + 1:02d}T10:00:00Z",
+            "message": " ".join(rng.choice(vocab) for _ in range(4)) + f"\n\nbody {i}",
+            "additions": size,
+            "deletions": i % 3,
+            "author": {"name": f"Author{i % 40}", "login": None},
+        })
+    return commits
+
+
+class TestSpaceSaving(unittest.TestCase):
+
+    def test_exact_below_capacity(self):
+        """Test that counts are exact while the summary has room."""
+        sketch = SpaceSaving(10)
+        for w in ["a", "b", "a", "c", "a", "b"]:
+            sketch.add(w)
+        self.assertEqual(sketch.top(2), [("a", 3, 0), ("b", 2, 0)])
+
+    def test_error_bounds_hold_after_merge(self):
+        """Test that true counts stay within [count - error, count] after merging full summaries."""
+        rng = random.Random(1)
+        streams = [[f"w{int(rng.paretovariate(1.2))}" for _ in range(2000)] for _ in range(4)]
+        merged = SpaceSaving(20)
+        for stream in streams:
+            part = SpaceSaving(20)
+            for w in stream:
+                part.add(w)
+            merged.merge(part)
+
+        truth = {}
+        for stream in streams:
+            for w in stream:
+                truth[w] = truth.get(w, 0) + 1
+        self.assertLessEqual(len(merged.counters), 20)
+        for item, count, error in merged.top(5):
+            self.assertLessEqual(count - error, truth[item])
+            self.assertGreaterEqual(count, truth[item])
+        self.assertEqual(merged.top(1)[0][0], max(truth, key=truth.get))
+
+
+class TestHyperLogLog(unittest.TestCase):
+
+    def test_estimate_within_error(self):
+        """Test that merged estimates land within a few standard errors."""
+        left, right = HyperLogLog(), HyperLogLog()
+        for i in range(30000):
+            (left if i % 2 else right).add(f"user{i}")
+            left.add(f"user{i % 100}")  # duplicates must not count twice
+        left.merge(right)
+        self.assertAlmostEqual(left.estimate(), 30000, delta=30000 * 4 * left.relative_error)
+
+    def test_small_cardinality_is_near_exact(self):
+        """Test that linear counting keeps small sets accurate."""
+        sketch = HyperLogLog()
+        for name in ["alice", "bob", "carol", "alice"]:
+            sketch.add(name)
+        self.assertEqual(round(sketch.estimate()), 3)
+
+    def test_round_trip(self):
+        """Test that the sparse serialization restores the same registers."""
+        sketch = HyperLogLog()
+        for i in range(100):
+            sketch.add(str(i))
+        restored = HyperLogLog.from_dict(json.loads(json.dumps(sketch.to_dict())))
+        self.assertEqual(restored.registers, sketch.registers)
+
+
+class TestTDigest(unittest.TestCase):
+
+    def test_quantiles_of_merged_digests(self):
+        """Test that quantiles of merged digests are close to the exact ones."""
+        rng = random.Random(3)
+        values = [rng.expovariate(1 / 50) for _ in range(20000)]
+        merged = TDigest()
+        for i in range(0, len(values), 1000):
+            part = TDigest()
+            for v in values[i:i + 1000]:
+                part.add(v)
+            merged.merge(part)
+
+        values.sort()
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * len(values))]
+            self.assertAlmostEqual(merged.quantile(q), exact, delta=exact * 0.05)
+        self.assertLess(len(merged.centroids), 200)
+
+    def test_empty_digest(self):
+        """Test that an empty digest has no quantiles."""
+        self.assertIsNone(TDigest().quantile(0.5))
+
+
+class TestApproximateAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        self.commits = _commits(1000)
+        self.stop_words = {"body"}
+        self.sketch = CommitSketch()
+        for c in self.commits:
+            self.sketch.add(c, self.stop_words)
+
+    def test_authors_estimate(self):
+        """Test that the distinct author estimate matches the exact count."""
+        result = get_approx_authors(self.sketch)
+        self.assertEqual(result["distinct_authors"], len(get_authors_from_commit(self.commits)))
+        self.assertTrue(result["approximate"])
+
+    def test_outliers_match_exact_path(self):
+        """Test that outliers from retained candidates equal the exact z-score outliers."""
+        result = get_approx_outliers(self.sketch)
+        exact = get_api_outliers_stdev(self.commits)
+        self.assertTrue(result["complete"])
+        # ties in z-score may come out in a different order
+        self.assertEqual(sorted(result["outliers"], key=lambda o: o["sha"]), sorted(exact, key=lambda o: o["sha"]))
+        self.assertEqual([o["z_score"] for o in result["outliers"]], [o["z_score"] for o in exact])
+        self.assertIn("p99", result["quantiles"])
+
+    def test_words_match_exact_counts(self):
+        """Test that word counts are exact when the vocabulary fits the summary."""
+        result = get_approx_most_frequent_words(self.sketch)
+        exact = {w["text"]: w["value"] for w in get_most_frequent_words(self.commits, self.stop_words)}
+        self.assertEqual(result["max_error"], 0)
+        self.assertEqual({w["text"]: w["value"] for w in result["words"]}, exact)
+
+    def test_empty_sketch(self):
+        """Test that an empty range returns empty approximate results."""
+        empty = CommitSketch()
+        self.assertEqual(get_approx_outliers(empty)["outliers"], [])
+        self.assertEqual(get_approx_most_frequent_words(empty)["words"], [])
+        self.assertEqual(get_approx_authors(empty)["distinct_authors"], 0)
+
+
+class TestSketchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.commits = _commits(280)
+        self.loads = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _query(self, index, start, end):
+        return index.query(start, end, self._load, len(self.commits))
+
+    def _load(self, start, end):
+        self.loads.append((start, end))
+        return [c for c in self.commits if start <= c["date"][:10] <= end]
+
+    def _index(self):
+        return SketchIndex("owner", "repo", "json", self.tmp.name, set())
+
+    def test_range_merges_per_day_sketches(self):
+        """Test that a range query covers exactly the commits of its days."""
+        sketch = self._query(self._index(), "2024-01-01", "2024-01-10")
+        self.assertEqual(sketch.count, 100)
+
+    def test_only_missing_days_are_loaded(self):
+        """Test that indexed days are reused, also after reloading from disk."""
+        self._query(self._index(), "2024-01-01", "2024-01-10")
+        sketch = self._query(self._index(), "2024-01-05", "2024-01-12")
+        self.assertEqual(self.loads, [("2024-01-01", "2024-01-10"), ("2024-01-11", "2024-01-12")])
+        self.assertEqual(sketch.count, 80)
+
+    def test_update_only_touches_indexed_days(self):
+        """Test that new commits are folded into indexed days without double counting the rest."""
+        index = self._index()
+        self._query(index, "2024-01-01", "2024-01-01")
+        new_commits = [dict(self.commits[0], sha="new1"), dict(self.commits[1], sha="new2")]
+        self.commits.extend(new_commits)
+        index.update(new_commits, len(self.commits))
+        self.assertEqual(self._query(index, "2024-01-01", "2024-01-01").count, 11)
+        self.assertEqual(self._query(index, "2024-01-02", "2024-01-02").count, 11)
+        self.assertEqual(self.loads, [("2024-01-01", "2024-01-01"), ("2024-01-02", "2024-01-02")])
+
+    def test_store_kinds_keep_separate_indexes(self):
+        """Test that switching COMMIT_STORE does not reuse sketches built from the other store."""
+        self._query(self._index(), "2024-01-01", "2024-01-01")
+        sqlite_index = SketchIndex("owner", "repo", "sqlite", self.tmp.name, set())
+        self.assertNotEqual(sqlite_index.path, self._index().path)
+        sqlite_index.update(self.commits, len(self.commits))
+        self.assertEqual(self._query(sqlite_index, "2024-01-01", "2024-01-01").count, 10)
+
+    def test_refilled_store_does_not_double_count(self):
+        """Test that commits coming back from a store refilled from scratch replace the old days."""
+        self._query(self._index(), "2024-01-01", "2024-01-01")
+        # e.g. after switching COMMIT_STORE: the new store starts empty and every commit is new again
+        index = self._index()
+        index.update(self.commits, len(self.commits))
+        self.assertEqual(self._query(index, "2024-01-01", "2024-01-01").count, 10)
+
+    def test_store_changed_elsewhere_rebuilds_days(self):
+        """Test that a store count that moved without update(), e.g. by compaction, drops the index."""
+        self._query(self._index(), "2024-01-01", "2024-01-01")
+        self.commits.append(dict(self.commits[0], sha="compacted"))
+        self.assertEqual(self._query(self._index(), "2024-01-01", "2024-01-01").count, 11)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)